@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class BlobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.blobs'
+    verbose_name = 'Media blobs'
+
+    def ready(self):
+        from apps.blobs import signals  # noqa: F401
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('sizes', models.JSONField(blank=True, default=list)),
+                ('source_hash', models.CharField(blank=True, db_index=True, default='', max_length=64)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'media_blobs',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 16:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='placeholder',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class Blob(models.Model):
+    """
+    A processed image stored once under its content hash and shared by
+    every row that uploaded the same picture. Deleted with its files when
+    the last reference goes away.
+    """
+    hash = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveIntegerField(default=0)
+    # Responsive copies: [{'width', 'webp', 'jpeg'}], built on first use
+    sizes = models.JSONField(default=list, blank=True)
+    # BlurHash placeholder, built on first use
+    placeholder = models.CharField(max_length=100, blank=True, default='')
+    # SHA-256 of the upload the blob was made from, to skip recompressing it
+    source_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'media_blobs'
+
+    def __str__(self):
+        return f'{self.name} ({self.ref_count} refs)'
@@ -0,0 +1,15 @@
+from django.apps import apps
+from django.db.models.signals import post_delete
+
+from apps.blobs.store import release
+
+# Models whose image field may point at a shared blob
+BLOB_MODELS = ['products.Category', 'products.ProductImage', 'chat.Message']
+
+
+def image_owner_deleted(sender, instance, **kwargs):
+    release(instance.image_hash)
+
+
+for label in BLOB_MODELS:
+    post_delete.connect(image_owner_deleted, sender=apps.get_model(label))
@@ -0,0 +1,123 @@
+"""
+Shared image blobs with reference counting.
+Every row holding a blob's name in its image field counts as one reference
+and stores the blob hash in its image_hash. Uploads of a picture that is
+already stored only take another reference: nothing is compressed or
+written again. Files are removed once the last reference is released.
+
+Writing a blob's files with its row and deleting an orphan's files both
+hold a per-hash advisory lock, so a picture uploaded again while its old
+blob is being deleted never loses its files.
+"""
+import logging
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import connection, transaction
+from django.db.models import F
+
+from apps.blobs.models import Blob
+from utils.images import compress_image, file_sha256, generate_derivatives, make_placeholder
+from utils.storage import blob_storage, content_sha256
+
+logger = logging.getLogger(__name__)
+
+
+def _lock(digest: str):
+    """Hold the files of one blob until the current transaction ends."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [int(digest[:15], 16)])
+
+
+def acquire(digest: str) -> Blob | None:
+    """Take a reference to an existing blob, or return None if there is none."""
+    if Blob.objects.filter(hash=digest).update(ref_count=F('ref_count') + 1):
+        return Blob.objects.get(hash=digest)
+    return None
+
+
+def store_image(image_field, compress=True):
+    """
+    Store an uploaded image as a blob and take a reference to it.
+    The image is compressed first unless `compress` is False (for files
+    that were already optimized). Returns (blob, created), or None if the
+    image can't be read.
+    """
+    source_hash = file_sha256(image_field)
+    known = Blob.objects.filter(source_hash=source_hash).values_list('hash', flat=True).first()
+    blob = known and acquire(known)
+    if blob:
+        return blob, False
+
+    image_field.open('rb')
+    try:
+        if compress:
+            content = compress_image(image_field)
+            if not isinstance(content, InMemoryUploadedFile):
+                return None
+        else:
+            content = ContentFile(image_field.read(), name=image_field.name)
+    finally:
+        image_field.close()
+
+    digest = content_sha256(content)
+    with transaction.atomic():
+        # Waits for a release of the same picture deleting its files, and
+        # for another worker storing it, then sees their rows
+        _lock(digest)
+        blob = acquire(digest)
+        if blob:
+            return blob, False
+        name = blob_storage.save(content.name, content)
+        blob = Blob.objects.create(
+            hash=digest, name=name, size=content.size,
+            source_hash=source_hash, ref_count=1,
+        )
+    return blob, True
+
+
+def blob_sizes(blob: Blob, image_field) -> list:
+    """
+    Responsive sizes of a blob, generated from `image_field` (which must
+    point at the blob) the first time any row needs them.
+    """
+    if not blob.sizes:
+        blob.sizes = generate_derivatives(image_field)
+        Blob.objects.filter(hash=blob.hash).update(sizes=blob.sizes)
+    return blob.sizes
+
+
+def blob_placeholder(blob: Blob, image_field) -> str:
+    """BlurHash of a blob, computed from `image_field` on first use."""
+    if not blob.placeholder:
+        blob.placeholder = make_placeholder(image_field)
+        Blob.objects.filter(hash=blob.hash).update(placeholder=blob.placeholder)
+    return blob.placeholder
+
+
+def _delete_files(blob: Blob):
+    names = [blob.name]
+    for size in blob.sizes:
+        names += [size['webp'], size['jpeg']]
+    with transaction.atomic():
+        _lock(blob.hash)
+        # The same picture may have been uploaded again since the release
+        if Blob.objects.filter(hash=blob.hash).exists():
+            return
+        for name in names:
+            try:
+                blob_storage.delete(name)
+            except OSError as e:
+                logger.warning(f'Could not delete blob file {name}: {e}')
+
+
+def release(digest: str):
+    """Drop one reference to a blob, deleting it after commit if it was the last."""
+    if not digest:
+        return
+    with transaction.atomic():
+        Blob.objects.filter(hash=digest, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+        orphan = Blob.objects.select_for_update().filter(hash=digest, ref_count=0).first()
+        if orphan is not None:
+            Blob.objects.filter(hash=digest).delete()
+            transaction.on_commit(lambda: _delete_files(orphan))
@@ -0,0 +1,57 @@
+"""
+Background worker that delivers queued Telegram messages (apps.bot.outbox).
+Several dispatchers may run at once; each claims its own rows, and
+the --rate limit then applies to each of them.
+
+    python manage.py dispatch_outbox
+"""
+import asyncio
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.bot.outbox import dispatch, make_bot
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued Telegram messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Seconds to wait when there is nothing to send',
+        )
+        parser.add_argument('--batch-size', type=int, default=25)
+        parser.add_argument(
+            '--rate', type=float, default=25.0,
+            help='Messages per second at most; Telegram allows about 30 for a bot',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when nothing is due instead of waiting for new messages',
+        )
+
+    def handle(self, *args, **options):
+        loop = asyncio.new_event_loop()
+        bot = make_bot()
+        self.stdout.write(self.style.SUCCESS('Outbox dispatcher is running'))
+        while True:
+            close_old_connections()
+            started = time.monotonic()
+            try:
+                sent = dispatch(loop, bot, options['batch_size'])
+            except Exception as e:
+                logger.exception(f'Outbox dispatch failed: {e}')
+                sent = 0
+            if sent:
+                self.stdout.write(f'  processed {sent} messages')
+                # Spread batches out to stay under the rate limit
+                time.sleep(max(0.0, sent / options['rate'] - (time.monotonic() - started)))
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0003_outbox_lease'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(fields=['chat_id', 'sent_at'], name='bot_outbox_chat_sent_idx'),
+        ),
+    ]
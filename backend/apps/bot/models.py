@@ -0,0 +1,78 @@
+from django.db import models
+
+
+class OutboxJob(models.Model):
+    """Outbox messages queued together by one admin action, to report progress."""
+    description = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'bot_outbox_jobs'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'Job #{self.pk}: {self.description}'
+
+    def progress(self) -> dict:
+        """Message counts by status, in one query."""
+        counts = dict(
+            self.messages.order_by().values_list('status').annotate(count=models.Count('id'))
+        )
+        pending = counts.get('pending', 0) + counts.get('sending', 0)
+        sent = counts.get('sent', 0)
+        failed = counts.get('failed', 0)
+        return {
+            'id': self.pk,
+            'description': self.description,
+            'total': pending + sent + failed,
+            'sent': sent,
+            'failed': failed,
+            'pending': pending,
+            'done': pending == 0,
+            'created_at': self.created_at,
+        }
+
+
+class OutboxMessage(models.Model):
+    """
+    A Telegram message waiting to be sent by the `dispatch_outbox` worker.
+    Written in the same transaction as the change it reports, so it is
+    sent if and only if that change was committed.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает отправки'),
+        # Leased by a dispatcher until next_attempt_at
+        ('sending', 'Отправляется'),
+        ('sent', 'Отправлено'),
+        ('failed', 'Ошибка'),
+    ]
+
+    chat_id = models.BigIntegerField()
+    text = models.TextField()
+    # InlineKeyboardMarkup.to_dict()
+    reply_markup = models.JSONField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(auto_now_add=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    job = models.ForeignKey(
+        OutboxJob, on_delete=models.SET_NULL, null=True, blank=True, related_name='messages',
+    )
+
+    class Meta:
+        db_table = 'bot_outbox'
+        ordering = ['next_attempt_at']
+        indexes = [
+            # The dispatcher only scans due pending messages and expired leases
+            models.Index(
+                fields=['next_attempt_at'], name='bot_outbox_due_idx',
+                condition=models.Q(status__in=['pending', 'sending']),
+            ),
+            # Recent sends to a chat, for the per-chat rate limit
+            models.Index(fields=['chat_id', 'sent_at'], name='bot_outbox_chat_sent_idx'),
+        ]
+
+    def __str__(self):
+        return f'Message to {self.chat_id} ({self.status})'
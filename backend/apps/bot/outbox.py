@@ -0,0 +1,151 @@
+"""
+Transactional outbox for Telegram messages.
+Callers queue messages with send_later() inside their own transaction;
+the `dispatch_outbox` worker delivers them with retries and backoff,
+without holding a transaction open while Telegram answers.
+"""
+import asyncio
+import logging
+from datetime import timedelta
+
+import telegram
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.bot.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 5       # seconds before the first retry, doubled each time
+BACKOFF_MAX = 60 * 60  # never wait longer than an hour
+# A claimed batch is sent again by another dispatcher if its outcome isn't
+# recorded within this time
+SEND_LEASE = timedelta(minutes=2)
+# Telegram allows about one message a second per chat
+CHAT_INTERVAL = timedelta(seconds=1)
+
+
+def send_later(chat_ids, text: str, reply_markup=None, job=None):
+    """Queue a message to each chat; it is sent once the transaction commits."""
+    send_each_later([(chat_id, text) for chat_id in chat_ids], reply_markup, job)
+
+
+def send_each_later(messages, reply_markup=None, job=None):
+    """Like send_later() for (chat_id, text) pairs with a text per chat."""
+    markup = reply_markup.to_dict() if reply_markup is not None else None
+    OutboxMessage.objects.bulk_create([
+        OutboxMessage(chat_id=chat_id, text=text, reply_markup=markup, job=job)
+        for chat_id, text in messages
+    ])
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX))
+
+
+async def _send_all(bot, messages):
+    return await asyncio.gather(*[
+        bot.send_message(
+            chat_id=message.chat_id,
+            text=message.text,
+            reply_markup=(
+                telegram.InlineKeyboardMarkup.de_json(message.reply_markup, bot)
+                if message.reply_markup else None
+            ),
+        )
+        for message in messages
+    ], return_exceptions=True)
+
+
+def _claim(now, batch_size: int) -> list:
+    """
+    Lease a batch of due messages to this dispatcher in a short transaction.
+    Messages whose lease ran out (the dispatcher died while sending) are
+    due again.
+    """
+    with transaction.atomic():
+        due = list(
+            OutboxMessage.objects
+            .select_for_update(skip_locked=True)
+            .filter(status__in=['pending', 'sending'], next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        # Chats sent to within the last interval, or being sent to by
+        # another dispatcher, have to wait
+        busy = set(
+            OutboxMessage.objects.filter(chat_id__in={message.chat_id for message in due})
+            .filter(
+                Q(sent_at__gt=now - CHAT_INTERVAL)
+                | Q(status='sending', next_attempt_at__gt=now)
+            )
+            .values_list('chat_id', flat=True)
+        )
+        messages, deferred = [], []
+        for message in due:
+            if message.chat_id in busy:
+                message.next_attempt_at = now + CHAT_INTERVAL
+                deferred.append(message)
+                continue
+            busy.add(message.chat_id)
+            message.status = 'sending'
+            message.next_attempt_at = now + SEND_LEASE
+            messages.append(message)
+        OutboxMessage.objects.bulk_update(messages + deferred, ['status', 'next_attempt_at'])
+    return messages
+
+
+def _record(message, result):
+    message.attempts += 1
+    if not isinstance(result, Exception):
+        message.status = 'sent'
+        message.sent_at = timezone.now()
+        message.last_error = ''
+        return
+
+    message.status = 'pending'
+    message.last_error = str(result)
+    if isinstance(result, telegram.error.RetryAfter):
+        retry_after = result.retry_after
+        if not isinstance(retry_after, timedelta):
+            retry_after = timedelta(seconds=retry_after)
+        message.next_attempt_at = timezone.now() + retry_after
+    elif isinstance(result, (telegram.error.Forbidden, telegram.error.BadRequest)):
+        # The user blocked the bot or the message is invalid: retrying won't help
+        message.status = 'failed'
+    elif message.attempts >= MAX_ATTEMPTS:
+        message.status = 'failed'
+    else:
+        message.next_attempt_at = timezone.now() + _backoff(message.attempts)
+    logger.warning(f'Failed to send outbox message {message.pk} to {message.chat_id}: {result}')
+
+
+def dispatch(loop, bot, batch_size: int = 25) -> int:
+    """
+    Send one batch of due messages. Returns how many were processed.
+    Messages are leased (status "sending") in one short transaction, sent
+    with no transaction or row lock open, and their outcomes written in
+    another. A dispatcher that crashes mid-batch leaves them to be picked
+    up again once the lease runs out. A message may then be delivered
+    twice, but never lost.
+    A chat gets at most one message per CHAT_INTERVAL, across batches and
+    dispatchers; its other due messages are pushed back by that interval.
+    """
+    messages = _claim(timezone.now(), batch_size)
+    if not messages:
+        return 0
+
+    results = loop.run_until_complete(_send_all(bot, messages))
+    for message, result in zip(messages, results):
+        _record(message, result)
+    with transaction.atomic():
+        OutboxMessage.objects.bulk_update(
+            messages, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'],
+        )
+    return len(messages)
+
+
+def make_bot():
+    return telegram.Bot(token=settings.TELEGRAM_BOT_TOKEN)
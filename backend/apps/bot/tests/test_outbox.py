@@ -0,0 +1,60 @@
+import asyncio
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.bot import outbox
+from apps.bot.models import OutboxJob, OutboxMessage
+
+
+class RecordingBot:
+    """Stands in for telegram.Bot and records the chats it sends to."""
+
+    def __init__(self):
+        self.chats = []
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        self.chats.append(chat_id)
+
+
+class JobProgressTests(TestCase):
+    def test_counts_by_status(self):
+        job = OutboxJob.objects.create(description='Статус заказов: Доставлен')
+        statuses = ['pending', 'pending', 'sending', 'sent', 'sent', 'sent', 'failed']
+        OutboxMessage.objects.bulk_create([
+            OutboxMessage(chat_id=i, text='Заказ доставлен', status=status, job=job)
+            for i, status in enumerate(statuses)
+        ])
+
+        progress = job.progress()
+        self.assertEqual(
+            {key: progress[key] for key in ('total', 'sent', 'failed', 'pending', 'done')},
+            {'total': 7, 'sent': 3, 'failed': 1, 'pending': 3, 'done': False},
+        )
+
+        job.messages.filter(status__in=['pending', 'sending']).update(status='sent')
+        progress = job.progress()
+        self.assertEqual((progress['sent'], progress['pending'], progress['done']), (6, 0, True))
+
+
+class ChatIntervalTests(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def test_one_message_per_second_per_chat(self):
+        outbox.send_each_later([(1, 'Первое'), (1, 'Второе'), (1, 'Третье'), (2, 'Другой чат')])
+        bot = RecordingBot()
+
+        self.assertEqual(outbox.dispatch(self.loop, bot), 2)
+        self.assertEqual(sorted(bot.chats), [1, 2])
+        # The rest of chat 1 waits out the interval
+        self.assertEqual(outbox.dispatch(self.loop, bot), 0)
+        self.assertEqual(OutboxMessage.objects.filter(chat_id=1, status='pending').count(), 2)
+
+        later = timezone.now() + timedelta(seconds=2)
+        self.assertEqual(len(outbox._claim(later, 25)), 1)
+        # Still leased to a dispatcher: the last message has to wait for it
+        self.assertEqual(outbox._claim(later + outbox.CHAT_INTERVAL * 2, 25), [])
+        self.assertEqual(OutboxMessage.objects.filter(chat_id=1, status='sent').count(), 1)
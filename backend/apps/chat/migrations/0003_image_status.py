@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_message_image_message_video_alter_message_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='image_status',
+            field=models.CharField(choices=[('pending', 'Обрабатывается'), ('ready', 'Готово'), ('failed', 'Ошибка')], default='ready', editable=False, max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_image_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='image_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
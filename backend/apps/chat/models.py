@@ -1,6 +1,12 @@
 from django.db import models
+from apps.blobs.store import release
 from apps.users.models import User
-from utils.images import compress_image
+from utils.images import (
+    IMAGE_PENDING,
+    IMAGE_READY,
+    IMAGE_STATUS_CHOICES,
+    schedule_image_processing,
+)
 
 
 class ChatRoom(models.Model):
@@ -22,6 +28,12 @@ class Message(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     text = models.TextField(blank=True, default='')
     image = models.ImageField(upload_to='chat/images/', blank=True, null=True)
+    image_status = models.CharField(
+        max_length=10, choices=IMAGE_STATUS_CHOICES,
+        default=IMAGE_READY, editable=False,
+    )
+    # Hash of the shared blob the image points at, empty until processed
+    image_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
     video = models.FileField(upload_to='chat/videos/', blank=True, null=True)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -31,11 +43,16 @@ class Message(models.Model):
         ordering = ['created_at']
 
     def save(self, *args, **kwargs):
-        if self.image and hasattr(self.image, 'file'):
-            compressed = compress_image(self.image)
-            if compressed:
-                self.image = compressed
+        # New uploads are stored as is and compressed in the background
+        new_upload = bool(self.image) and not self.image._committed
+        if new_upload or not self.image:
+            # Let go of the shared blob the old image pointed at
+            release(self.image_hash)
+            self.image_hash = ''
+            self.image_status = IMAGE_PENDING if new_upload else IMAGE_READY
         super().save(*args, **kwargs)
+        if new_upload:
+            schedule_image_processing(self)
 
     def __str__(self):
         return f'Message from {self.sender} in {self.room}'
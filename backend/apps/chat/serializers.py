@@ -10,8 +10,8 @@ class MessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Message
-        fields = ['id', 'room', 'sender', 'sender_name', 'sender_is_admin', 'text', 'image', 'video', 'is_read', 'created_at']
-        read_only_fields = ['id', 'room', 'sender', 'is_read', 'created_at']
+        fields = ['id', 'room', 'sender', 'sender_name', 'sender_is_admin', 'text', 'image', 'image_status', 'video', 'is_read', 'created_at']
+        read_only_fields = ['id', 'room', 'sender', 'image_status', 'is_read', 'created_at']
 
     def get_image(self, obj):
         if obj.image:
@@ -12,3 +12,9 @@ class OrderAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'status', 'total', 'created_at']
     list_filter = ['status']
     inlines = [OrderItemInline]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Items edited inline bypass create_order, which keeps item_count
+        order = form.instance
+        Order.objects.filter(pk=order.pk).update(item_count=order.items.count())
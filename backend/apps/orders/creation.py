@@ -0,0 +1,88 @@
+"""
+Order creation.
+The whole order is priced by PricingEngine and written in one transaction
+with a fixed number of queries: stock is reserved with one locked read
+and one conditional update, items are written with one bulk_create(),
+whatever the size of the cart. The admin notification is queued in the
+same transaction.
+"""
+from django.db import transaction
+
+from apps.orders.models import Order, OrderItem
+from apps.orders.notifications import queue_new_order_notification
+from apps.orders.pricing import OrderError, PricingEngine
+from apps.products import stock
+
+
+def create_order(
+    user, data, idempotency_key: str | None = None, idempotency_fingerprint: str = '', notify: bool = True,
+) -> Order:
+    """
+    Create an order from validated OrderCreateSerializer data.
+    Raises OrderError if a product doesn't exist or is out of stock;
+    nothing is written then.
+    Raises IntegrityError if the user already has an order with this
+    idempotency key.
+    """
+    with transaction.atomic():
+        quote = PricingEngine().quote(
+            data['items'],
+            delivery_method=data.get('delivery_method', ''),
+            is_urgent=data.get('is_urgent', False),
+        )
+        items = [
+            OrderItem(
+                product=line.product,
+                product_name=line.product_name,
+                quantity=line.quantity,
+                price_type=line.price_type,
+                price=line.price,
+            )
+            for line in quote.lines
+        ]
+
+        order = Order.objects.create(
+            user=user,
+            delivery_method=data.get('delivery_method', ''),
+            delivery_district=data.get('delivery_district', ''),
+            delivery_interval=data.get('delivery_interval', ''),
+            is_urgent=data.get('is_urgent', False),
+            payment_method=data.get('payment_method', ''),
+            address=data.get('address', ''),
+            comment=data.get('comment', ''),
+            promo_code=data.get('promo_code', ''),
+            delivery_price=quote.delivery_price,
+            urgency_surcharge=quote.urgency_surcharge,
+            total=quote.total,
+            item_count=len(items),
+            idempotency_key=idempotency_key,
+            idempotency_fingerprint=idempotency_fingerprint,
+        )
+
+        # Stock rows stay locked until commit, so this comes after the
+        # order insert and only the item insert is left
+        amounts = [
+            (line.product.pk, *stock.stock_amount(line.price_type, line.quantity, line.selected_grams))
+            for line in quote.lines
+        ]
+        try:
+            reserved = stock.reserve(stock.total_needs(amounts))
+        except stock.OutOfStock as e:
+            name = next(line.product.name for line in quote.lines if line.product.pk == e.product_id)
+            raise OrderError(f'Not enough {name} in stock')
+
+        for item, (product_id, stock_type, amount) in zip(items, amounts):
+            item.order = order
+            # Share out what was taken for the row, so cancelling gives
+            # back exactly that
+            left = reserved.get((product_id, stock_type), 0)
+            item.reserved = min(amount, left)
+            if left:
+                reserved[(product_id, stock_type)] = left - item.reserved
+        OrderItem.objects.bulk_create(items)
+
+        if notify:
+            # Delivered by the outbox dispatcher, only if the order is committed
+            queue_new_order_notification(order, items)
+
+    return order
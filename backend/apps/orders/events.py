@@ -0,0 +1,149 @@
+"""
+Live order events for admin screens.
+Events are published to a Redis pub/sub channel once the transaction that
+caused them commits, and kept in a short capped log so a client that
+reconnects with Last-Event-ID gets what it missed. Event ids come from a
+Redis counter and only grow; a Lua script numbers, logs and publishes each
+event atomically, so clients always receive them in id order.
+
+Events:
+    order.created  the new order, as OrderSerializer renders it
+    order.status   {"ids": [...], "status": "..."}
+    reset          the client was away too long, reload the list
+"""
+import json
+import logging
+import time
+import uuid
+
+from django.db import transaction
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = 'order.created'
+ORDER_STATUS = 'order.status'
+RESET = 'reset'
+
+CHANNEL = 'orders:events'
+LOG_KEY = 'orders:events:log'
+SEQUENCE_KEY = 'orders:events:seq'
+
+# Events kept for replay
+REPLAY_SIZE = 500
+# Comment line sent when nothing happened for this long, keeps proxies from closing
+HEARTBEAT = 15
+# Streams end after this long and the client reconnects, so a worker
+# thread is never held forever
+MAX_DURATION = 300
+# Client reconnect delay, milliseconds
+RETRY = 3000
+# Open streams allowed per user; each one holds a worker thread
+MAX_STREAMS_PER_USER = 3
+STREAMS_KEY = 'orders:events:streams:{}'
+
+
+# Numbers the event, logs and publishes it in one step, so events are
+# published and logged in id order even with concurrent publishers
+PUBLISH_SCRIPT = """
+local id = redis.call('INCR', KEYS[1])
+local message = '{"id": ' .. id .. ', "event": ' .. ARGV[1] .. ', "data": ' .. ARGV[2] .. '}'
+redis.call('LPUSH', KEYS[2], message)
+redis.call('LTRIM', KEYS[2], 0, tonumber(ARGV[3]) - 1)
+redis.call('PUBLISH', KEYS[3], message)
+return id
+"""
+
+# Drops expired stream slots, then takes one if the user is under the limit
+ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+
+
+def acquire_stream(user_id: int, max_duration: float = MAX_DURATION) -> str | None:
+    """
+    Take one of the user's MAX_STREAMS_PER_USER stream slots, or None if
+    all are in use. Slots expire shortly after the stream would have ended,
+    so one left behind by a killed worker frees itself.
+    """
+    token = uuid.uuid4().hex
+    now = time.time()
+    lifetime = int(max_duration + 2 * HEARTBEAT)
+    taken = get_redis_connection('default').register_script(ACQUIRE_SCRIPT)(
+        keys=[STREAMS_KEY.format(user_id)],
+        args=[now, MAX_STREAMS_PER_USER, now + lifetime, token, lifetime],
+    )
+    return token if taken else None
+
+
+def release_stream(user_id: int, token: str):
+    get_redis_connection('default').zrem(STREAMS_KEY.format(user_id), token)
+
+
+def _publish(event: str, data):
+    try:
+        redis = get_redis_connection('default')
+        redis.register_script(PUBLISH_SCRIPT)(
+            keys=[SEQUENCE_KEY, LOG_KEY, CHANNEL],
+            args=[json.dumps(event), json.dumps(data, default=str), REPLAY_SIZE],
+        )
+    except Exception as e:
+        # Live updates are a convenience, the change itself is committed
+        logger.warning(f'Could not publish {event}: {e}')
+
+
+def publish(event: str, data):
+    """Publish an event once the current transaction commits."""
+    transaction.on_commit(lambda: _publish(event, data))
+
+
+def _format(message: dict) -> str:
+    return f'id: {message["id"]}\nevent: {message["event"]}\ndata: {json.dumps(message["data"])}\n\n'
+
+
+def _missed(redis, last_id: int) -> list:
+    """Logged events after last_id, oldest first, or a reset if some were dropped."""
+    log = [json.loads(raw) for raw in reversed(redis.lrange(LOG_KEY, 0, -1))]
+    current = int(redis.get(SEQUENCE_KEY) or 0)
+    if last_id > current:
+        # The counter was lost, ids started over
+        return [{'id': current, 'event': RESET, 'data': {}}]
+    if log and log[0]['id'] > last_id + 1:
+        # Some of the missed events were already trimmed from the log
+        return [{'id': current, 'event': RESET, 'data': {}}]
+    return [message for message in log if message['id'] > last_id]
+
+
+def stream(last_id: int | None = None, max_duration: float = MAX_DURATION):
+    """Yield Server-Sent Events text, replaying what came after last_id first."""
+    redis = get_redis_connection('default')
+    pubsub = redis.pubsub(ignore_subscribe_messages=True)
+    # Subscribe before reading the log so nothing falls between the two
+    pubsub.subscribe(CHANNEL)
+    try:
+        yield f'retry: {RETRY}\n\n'
+        sent = last_id
+        if last_id is not None:
+            for message in _missed(redis, last_id):
+                yield _format(message)
+                sent = message['id']
+
+        deadline = time.monotonic() + max_duration
+        while time.monotonic() < deadline:
+            raw = pubsub.get_message(timeout=HEARTBEAT)
+            if raw is None:
+                yield ': ping\n\n'
+                continue
+            message = json.loads(raw['data'])
+            if sent is not None and message['id'] <= sent:
+                continue
+            yield _format(message)
+            sent = message['id']
+    finally:
+        pubsub.close()
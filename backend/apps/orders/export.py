@@ -0,0 +1,107 @@
+"""
+Order export for accounting.
+Orders are read as plain rows through a server-side cursor; items are
+fetched per chunk of orders with one query, and rows are written out one
+per item as they arrive. No model instances are built, so memory stays
+the same for a day or a year of orders.
+"""
+import csv
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderItem
+from utils import xlsx
+
+# Orders fetched from the cursor at a time
+CHUNK_SIZE = 500
+
+HEADER = [
+    'Заказ', 'Дата', 'Статус', 'Клиент', 'Телефон',
+    'Способ доставки', 'Район', 'Интервал', 'Срочно', 'Оплата', 'Адрес', 'Комментарий', 'Промокод',
+    'Товар', 'Тип цены', 'Количество', 'Цена', 'Сумма',
+    'Доставка', 'Наценка за срочность', 'Итого заказа',
+]
+
+ORDER_FIELDS = (
+    'id', 'created_at', 'status', 'user__telegram_id', 'user__first_name', 'user__last_name', 'user__phone',
+    'delivery_method', 'delivery_district', 'delivery_interval', 'is_urgent', 'payment_method',
+    'address', 'comment', 'promo_code', 'delivery_price', 'urgency_surcharge', 'total',
+)
+ITEM_FIELDS = ('order_id', 'product_name', 'price_type', 'quantity', 'price')
+
+STATUS_LABELS = dict(Order.STATUS_CHOICES)
+PRICE_TYPE_LABELS = dict(OrderItem.PRICE_TYPE_CHOICES)
+
+
+def _client_name(order) -> str:
+    # Same as User.display_name
+    name = ' '.join(part for part in (order['user__first_name'], order['user__last_name']) if part)
+    return name or str(order['user__telegram_id'])
+
+
+def export_rows(qs):
+    """
+    One row per order item; order columns repeat on each item row. Orders
+    without items get a single row with empty item columns.
+    """
+    orders = qs.order_by('-created_at', '-id').values(*ORDER_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    while chunk := list(islice(orders, CHUNK_SIZE)):
+        items = defaultdict(list)
+        for item in OrderItem.objects.filter(
+            order_id__in=[order['id'] for order in chunk],
+        ).order_by('id').values_list(*ITEM_FIELDS):
+            items[item[0]].append(item[1:])
+
+        for order in chunk:
+            order_columns = [
+                order['id'],
+                timezone.localtime(order['created_at']),
+                STATUS_LABELS.get(order['status'], order['status']),
+                _client_name(order),
+                order['user__phone'],
+                order['delivery_method'],
+                order['delivery_district'],
+                order['delivery_interval'],
+                'да' if order['is_urgent'] else '',
+                order['payment_method'],
+                order['address'],
+                order['comment'],
+                order['promo_code'],
+            ]
+            totals = [order['delivery_price'], order['urgency_surcharge'], order['total']]
+
+            if not items[order['id']]:
+                yield order_columns + ['', '', '', '', ''] + totals
+            for product_name, price_type, quantity, price in items[order['id']]:
+                yield order_columns + [
+                    product_name,
+                    PRICE_TYPE_LABELS.get(price_type, price_type),
+                    quantity,
+                    price,
+                    price * quantity,
+                ] + totals
+
+
+class _Echo:
+    """csv.writer target that hands back each line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    """Yield CSV lines. The BOM makes Excel read the file as UTF-8."""
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(HEADER)
+    for row in rows:
+        yield writer.writerow(
+            value.isoformat(sep=' ', timespec='seconds') if isinstance(value, datetime) else value
+            for value in row
+        )
+
+
+def stream_xlsx(rows):
+    return xlsx.stream_xlsx(HEADER, rows, sheet_name='Заказы')
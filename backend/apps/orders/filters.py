@@ -0,0 +1,63 @@
+"""
+Admin order list filters.
+Each filter maps onto an index of the orders table: the date range and
+keyset pagination use (created_at, id), the per-field filters use
+(field, created_at) composites, and the text search uses trigram indexes
+on UPPER(address) and UPPER(comment), the expressions icontains compares.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ParseError
+
+# Exact-match filters: query param -> field
+EXACT_FILTERS = {
+    'status': 'status',
+    'delivery_method': 'delivery_method',
+    'district': 'delivery_district',
+    'interval': 'delivery_interval',
+}
+
+
+def _day_start(raw: str, name: str):
+    """Start of a YYYY-MM-DD day in the shop's time zone."""
+    try:
+        day = parse_date(raw)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ParseError(f'Invalid {name}')
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_orders(qs, params):
+    """
+    Apply the admin list query params:
+    status, delivery_method, district, interval - exact match
+    date_from, date_to - creation date range, inclusive (YYYY-MM-DD)
+    is_urgent - 1 or 0
+    search - substring of the address or comment
+    """
+    for param, field in EXACT_FILTERS.items():
+        value = params.get(param)
+        if value:
+            qs = qs.filter(**{field: value})
+
+    # Compared as timestamps, a __date lookup would not use the index
+    if params.get('date_from'):
+        qs = qs.filter(created_at__gte=_day_start(params['date_from'], 'date_from'))
+    if params.get('date_to'):
+        qs = qs.filter(created_at__lt=_day_start(params['date_to'], 'date_to') + timedelta(days=1))
+
+    is_urgent = params.get('is_urgent')
+    if is_urgent in ('1', 'true'):
+        qs = qs.filter(is_urgent=True)
+    elif is_urgent in ('0', 'false'):
+        qs = qs.filter(is_urgent=False)
+
+    search = (params.get('search') or '').strip()
+    if search:
+        qs = qs.filter(Q(address__icontains=search) | Q(comment__icontains=search))
+    return qs
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-17 16:11
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_idempotency_key'),
+    ]
+
+    operations = [
+        # Already there if products migrated first, order is not guaranteed
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at', '-id'], name='orders_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='orders_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['delivery_method', '-created_at', '-id'], name='orders_method_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['delivery_district', '-created_at', '-id'], name='orders_district_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['delivery_interval', '-created_at', '-id'], name='orders_interval_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('is_urgent', True)), fields=['-created_at', '-id'], name='orders_urgent_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['address'], name='orders_address_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['comment'], name='orders_comment_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-17 16:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_item_count(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    counts = (
+        OrderItem.objects.filter(order=OuterRef('pk'))
+        .order_by().values('order').annotate(count=Count('id')).values('count')
+    )
+    Order.objects.update(item_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_admin_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='orders_user_created_idx'),
+        ),
+        migrations.RunPython(populate_item_count, migrations.RunPython.noop),
+    ]
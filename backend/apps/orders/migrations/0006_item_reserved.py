@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_item_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='reserved',
+            field=models.DecimalField(decimal_places=3, default=0, editable=False, max_digits=12),
+        ),
+    ]
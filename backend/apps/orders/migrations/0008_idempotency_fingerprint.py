@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_upper_trgm_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='idempotency_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
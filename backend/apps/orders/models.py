@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from apps.users.models import User
 from apps.products.models import Product
 
@@ -30,12 +32,42 @@ class Order(models.Model):
     promo_code = models.CharField(max_length=100, blank=True, default='')
 
     total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Number of items, kept so order lists don't have to load or count them
+    item_count = models.PositiveIntegerField(default=0, editable=False)
+    # Idempotency-Key of the request that created the order, guards against retries
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    # Fingerprint of that request's body, so reusing the key for another cart is refused
+    idempotency_fingerprint = models.CharField(max_length=64, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'orders'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination position, alone and after each admin filter
+            models.Index(fields=['-created_at', '-id'], name='orders_created_id_idx'),
+            # A client's order history
+            models.Index(fields=['user', '-created_at', '-id'], name='orders_user_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='orders_status_created_idx'),
+            models.Index(fields=['delivery_method', '-created_at', '-id'], name='orders_method_created_idx'),
+            models.Index(fields=['delivery_district', '-created_at', '-id'], name='orders_district_created_idx'),
+            models.Index(fields=['delivery_interval', '-created_at', '-id'], name='orders_interval_created_idx'),
+            models.Index(
+                fields=['-created_at', '-id'], name='orders_urgent_created_idx',
+                condition=models.Q(is_urgent=True),
+            ),
+            # The admin search's __icontains compares UPPER(column)
+            GinIndex(OpClass(Upper('address'), name='gin_trgm_ops'), name='orders_address_upper_trgm_idx'),
+            GinIndex(OpClass(Upper('comment'), name='gin_trgm_ops'), name='orders_comment_upper_trgm_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'idempotency_key'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name='orders_user_idempotency_key',
+            ),
+        ]
 
     def __str__(self):
         return f'Order #{self.id} by {self.user}'
@@ -56,6 +88,8 @@ class OrderItem(models.Model):
     quantity = models.DecimalField(max_digits=10, decimal_places=2, default=1)
     price_type = models.CharField(max_length=10, choices=PRICE_TYPE_CHOICES, default='kg')
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Taken from ProductStock, in stock units; zero if untracked or given back
+    reserved = models.DecimalField(max_digits=12, decimal_places=3, default=0, editable=False)
 
     class Meta:
         db_table = 'order_items'
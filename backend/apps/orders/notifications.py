@@ -0,0 +1,91 @@
+"""
+Telegram notifications about orders, to admins and clients.
+Messages are queued in the Telegram outbox within the caller's
+transaction and delivered by the `dispatch_outbox` worker.
+"""
+import os
+from collections import defaultdict
+
+import telegram
+from django.conf import settings as django_settings
+
+from apps.bot.outbox import send_each_later, send_later
+from apps.chat.models import ChatRoom
+from apps.orders.models import Order
+from apps.users.models import User
+
+PRICE_TYPE_LABELS = {
+    'kg': 'кг', 'gram': 'г', 'box': 'ящ', 'pack': 'уп', 'unit': 'шт',
+}
+
+STATUS_ICONS = {
+    'confirmed': '✅', 'preparing': '📦', 'delivering': '🚚', 'completed': '🎉', 'cancelled': '❌',
+}
+
+
+def queue_new_order_notification(order, items):
+    """Queue a message with inline buttons about a new order to every admin."""
+    # Build items list
+    items_lines = []
+    for item in items:
+        unit = PRICE_TYPE_LABELS.get(item.price_type, '')
+        qty_str = f"{item.quantity:.0f}" if item.quantity == int(item.quantity) else f"{item.quantity}"
+        items_lines.append(f"  • {item.product_name} — {qty_str} {unit} × {item.price:.0f} ₽")
+
+    items_text = '\n'.join(items_lines) if items_lines else '  (нет товаров)'
+
+    text = (
+        f"🛒 Новый заказ #{order.id}\n\n"
+        f"👤 {order.user.display_name}\n"
+        f"💰 Сумма: {order.total:.0f} ₽\n"
+        f"🚚 {order.delivery_method or '—'}\n"
+        f"💳 {order.payment_method or '—'}\n\n"
+        f"Товары:\n{items_text}"
+    )
+    if order.address:
+        text += f"\n\n📍 {order.address}"
+    if order.comment:
+        text += f"\n\n💬 {order.comment}"
+
+    # Ensure chat room exists for this client
+    chat_room, _ = ChatRoom.objects.get_or_create(client=order.user)
+
+    domain = os.environ.get('DOMAIN') or (django_settings.ALLOWED_HOSTS[0] if django_settings.ALLOWED_HOSTS else 'localhost')
+    webapp_url = f'https://{domain}?v=2'
+
+    keyboard = telegram.InlineKeyboardMarkup([
+        [telegram.InlineKeyboardButton(
+            text='📦 Открыть магазин',
+            web_app=telegram.WebAppInfo(url=webapp_url),
+        )],
+        [telegram.InlineKeyboardButton(
+            text='💬 Чат с клиентом',
+            web_app=telegram.WebAppInfo(url=f'{webapp_url}/admin/chat?room={chat_room.id}'),
+        )],
+    ])
+
+    admin_ids = User.objects.filter(is_admin=True).values_list('telegram_id', flat=True)
+    send_later(admin_ids, text, reply_markup=keyboard)
+
+
+def queue_status_notifications(orders, status: str, job=None) -> int:
+    """
+    Queue a message to each client whose orders moved to `status`, one per
+    client however many of their orders changed. `orders` are
+    (order_id, telegram_id) pairs. Returns how many messages were queued.
+    """
+    if status not in STATUS_ICONS:
+        return 0
+
+    by_client = defaultdict(list)
+    for order_id, telegram_id in orders:
+        by_client[telegram_id].append(order_id)
+
+    label = dict(Order.STATUS_CHOICES)[status]
+    messages = []
+    for telegram_id, order_ids in by_client.items():
+        numbers = ', '.join(f'#{order_id}' for order_id in sorted(order_ids))
+        subject = 'заказа' if len(order_ids) == 1 else 'заказов'
+        messages.append((telegram_id, f"{STATUS_ICONS[status]} Статус {subject} {numbers}: {label}"))
+    send_each_later(messages, job=job)
+    return len(messages)
@@ -0,0 +1,136 @@
+"""
+Cart pricing.
+PricingEngine prices a whole cart in one pass: products are loaded with a
+single in_bulk() and shop settings come from the settings cache, so a
+quote costs one query whatever the size of the cart. Order creation and
+the quote endpoint share it, so the totals shown at checkout are the
+ones the order gets.
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from apps.products.models import Product
+from apps.settings_app.cache import get_pricing_settings
+
+
+class OrderError(Exception):
+    """The cart can't be ordered as requested; the message is shown to the client."""
+
+
+@dataclass
+class QuoteLine:
+    product: Product
+    product_name: str
+    quantity: Decimal
+    price_type: str
+    price: Decimal
+    selected_grams: int = 0
+
+    @property
+    def subtotal(self) -> Decimal:
+        return self.price * self.quantity
+
+
+@dataclass
+class Quote:
+    lines: list = field(default_factory=list)
+    items_total: Decimal = Decimal('0')
+    delivery_price: Decimal = Decimal('0')
+    urgency_surcharge: Decimal = Decimal('0')
+    min_order_sum: Decimal = Decimal('0')
+
+    @property
+    def total(self) -> Decimal:
+        return self.items_total + self.delivery_price + self.urgency_surcharge
+
+    @property
+    def below_min_sum(self) -> bool:
+        return self.min_order_sum > 0 and self.items_total < self.min_order_sum
+
+
+def _unit_price(product, item_data):
+    """Price and display name of one cart line."""
+    price_type = item_data.get('price_type', 'kg')
+    if price_type == 'gram':
+        # For gram type, calculate price from price_per_100g * selected_grams / 100
+        selected_grams = item_data.get('selected_grams', 0)
+        if product.price_per_100g and selected_grams:
+            price = product.price_per_100g * Decimal(str(selected_grams)) / Decimal('100')
+        else:
+            price = product.main_price
+        return price, f"{product.name} ({selected_grams}г)"
+
+    price_map = {
+        'kg': product.price_per_kg,
+        'box': product.price_per_box,
+        'pack': product.price_per_pack,
+        'unit': product.price_per_unit,
+    }
+    price = price_map.get(price_type)
+    if price is None:
+        # Fallback to main price
+        price = product.main_price
+    return price, product.name
+
+
+def _parse_items(items):
+    """
+    Validate product ids and quantities of the raw cart lines. Quantities
+    and gram portions must be positive: a negative line would take stock
+    back from the rest of the cart.
+    """
+    parsed = []
+    for item_data in items:
+        product_id = item_data.get('product_id')
+        try:
+            product_id = int(product_id)
+            quantity = Decimal(str(item_data.get('quantity', 1)))
+            grams = int(item_data.get('selected_grams') or 0)
+        except (TypeError, ValueError, InvalidOperation):
+            raise OrderError(f'Invalid item: {item_data}')
+        if not quantity.is_finite() or quantity <= 0:
+            raise OrderError(f'Invalid quantity: {item_data}')
+        if item_data.get('price_type', 'kg') == 'gram' and grams <= 0:
+            raise OrderError(f'Invalid selected_grams: {item_data}')
+        parsed.append((product_id, quantity, item_data))
+    return parsed
+
+
+class PricingEngine:
+    """
+    Prices carts of raw items ({'product_id', 'quantity', 'price_type',
+    'selected_grams'}) with the current shop settings.
+    """
+
+    def __init__(self, pricing: dict | None = None):
+        self.pricing = pricing if pricing is not None else get_pricing_settings()
+
+    def quote(self, items, delivery_method: str = '', is_urgent: bool = False) -> Quote:
+        """Raises OrderError for malformed items or unknown products."""
+        lines = _parse_items(items)
+        products = Product.objects.in_bulk({product_id for product_id, _, _ in lines})
+
+        quote = Quote(min_order_sum=self.pricing['min_order_sum'])
+        for product_id, quantity, item_data in lines:
+            product = products.get(product_id)
+            if product is None:
+                raise OrderError(f'Product {product_id} not found')
+            price, product_name = _unit_price(product, item_data)
+            line = QuoteLine(
+                product=product,
+                product_name=product_name,
+                quantity=quantity,
+                price_type=item_data.get('price_type', 'kg'),
+                price=price,
+                selected_grams=item_data.get('selected_grams') or 0,
+            )
+            quote.lines.append(line)
+            quote.items_total += line.subtotal
+
+        # Delivery is free from the threshold on
+        if quote.items_total < self.pricing['free_delivery_threshold']:
+            quote.delivery_price = self.pricing['delivery_prices'].get(delivery_method, Decimal('0'))
+
+        if is_urgent and self.pricing['urgency_surcharge'] > 0:
+            quote.urgency_surcharge = self.pricing['urgency_surcharge']
+        return quote
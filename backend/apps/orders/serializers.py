@@ -21,21 +21,51 @@ class OrderSerializer(serializers.ModelSerializer):
             'delivery_method', 'delivery_district', 'delivery_interval',
             'delivery_price', 'is_urgent', 'urgency_surcharge',
             'payment_method', 'address', 'comment', 'promo_code',
-            'total', 'items', 'created_at', 'updated_at',
+            'total', 'item_count', 'items', 'created_at', 'updated_at',
         ]
         read_only_fields = ['id', 'user', 'total', 'created_at', 'updated_at']
 
 
-class OrderCreateSerializer(serializers.Serializer):
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """Order history row; items are only in OrderSerializer."""
+
+    class Meta:
+        model = Order
+        fields = ['id', 'status', 'total', 'item_count', 'created_at']
+
+
+class OrderQuoteSerializer(serializers.Serializer):
     delivery_method = serializers.CharField(required=False, default='', allow_blank=True)
+    is_urgent = serializers.BooleanField(required=False, default=False)
+    items = serializers.ListField(child=serializers.DictField(), min_length=1)
+
+
+class OrderCreateSerializer(OrderQuoteSerializer):
     delivery_district = serializers.CharField(required=False, default='', allow_blank=True)
     delivery_interval = serializers.CharField(required=False, default='', allow_blank=True)
-    is_urgent = serializers.BooleanField(required=False, default=False)
     payment_method = serializers.CharField(required=False, default='', allow_blank=True)
     address = serializers.CharField(required=False, default='', allow_blank=True)
     comment = serializers.CharField(required=False, default='', allow_blank=True)
     promo_code = serializers.CharField(required=False, default='', allow_blank=True)
-    items = serializers.ListField(child=serializers.DictField(), min_length=1)
+
+
+class QuoteLineSerializer(serializers.Serializer):
+    product = serializers.IntegerField(source='product.pk')
+    product_name = serializers.CharField()
+    quantity = serializers.DecimalField(max_digits=10, decimal_places=2)
+    price_type = serializers.CharField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class QuoteSerializer(serializers.Serializer):
+    items = QuoteLineSerializer(source='lines', many=True)
+    items_total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    delivery_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    urgency_surcharge = serializers.DecimalField(max_digits=10, decimal_places=2)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    min_order_sum = serializers.DecimalField(max_digits=10, decimal_places=2)
+    below_min_sum = serializers.BooleanField()
 
 
 class OrderStatusSerializer(serializers.Serializer):
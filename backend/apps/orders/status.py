@@ -0,0 +1,72 @@
+"""
+Order status changes.
+Changing the status of any number of orders takes a fixed number of
+queries: the orders are locked and updated in bulk, client notifications
+are queued in the outbox in the same transaction and sent later by the
+`dispatch_outbox` worker, so admin requests don't wait on Telegram.
+Cancelling gives the stock the orders reserved back, so cancelled
+orders can't be reopened: they hold no stock any more.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from apps.bot.models import OutboxJob
+from apps.orders import events
+from apps.orders.models import Order, OrderItem
+from apps.orders.notifications import queue_status_notifications
+from apps.orders.pricing import OrderError
+from apps.products import stock
+
+
+def _release_stock(order_ids):
+    """
+    Give back what the items of cancelled orders reserved. Items are marked
+    as released, so cancelling twice can't count the stock twice.
+    """
+    items = OrderItem.objects.filter(order_id__in=order_ids, reserved__gt=0)
+    lines = list(items.values_list('product_id', 'price_type', 'reserved'))
+    if not lines:
+        return
+    stock.release(stock.total_needs(
+        (product_id, stock.stock_type(price_type), reserved)
+        for product_id, price_type, reserved in lines
+        if product_id is not None
+    ))
+    items.update(reserved=0)
+
+
+def change_status(ids, status: str, job_description: str | None = None):
+    """
+    Move the given orders to `status` and queue client notifications.
+    Orders already in that status are left alone. With a job description,
+    the notifications are grouped in an OutboxJob whose progress can be
+    followed. Returns (changed order ids, job or None).
+    Raises OrderError, changing nothing, if a cancelled order would be
+    reopened.
+    """
+    with transaction.atomic():
+        locked = list(
+            Order.objects
+            .select_for_update(of=('self',))
+            .filter(id__in=ids)
+            .exclude(status=status)
+            .values_list('id', 'user__telegram_id', 'status')
+        )
+        reopened = [order_id for order_id, _, old_status in locked if old_status == 'cancelled']
+        if reopened:
+            numbers = ', '.join(f'#{order_id}' for order_id in sorted(reopened))
+            raise OrderError(f'Cancelled orders can\'t be reopened: {numbers}')
+        orders = [(order_id, telegram_id) for order_id, telegram_id, _ in locked]
+        changed = [order_id for order_id, _ in orders]
+        if not changed:
+            return [], None
+
+        # update() skips auto_now
+        Order.objects.filter(id__in=changed).update(status=status, updated_at=timezone.now())
+        if status == 'cancelled':
+            _release_stock(changed)
+
+        job = OutboxJob.objects.create(description=job_description) if job_description else None
+        queue_status_notifications(orders, status, job=job)
+        events.publish(events.ORDER_STATUS, {'ids': changed, 'status': status})
+    return changed, job
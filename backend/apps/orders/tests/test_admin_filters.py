@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from apps.orders.models import Order
+from apps.orders.views import admin_order_list
+from apps.users.models import User
+
+
+class AdminOrderFilterTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(telegram_id=1, is_admin=True)
+        client = User.objects.create(telegram_id=2)
+        # Midnight in the shop's time zone, where date ranges start
+        day = timezone.make_aware(datetime(2026, 3, 10))
+        rows = [
+            ('new', 'Доставка', 'Центр', False, 'ул. Ленина, 1', '', day - timedelta(minutes=1)),
+            ('new', 'Доставка', 'Центр', True, 'ул. Ленина, 5', 'позвонить', day),
+            ('done', 'Доставка', 'Север', True, 'пр. Мира, 3', '', day + timedelta(hours=12)),
+            ('new', 'Самовывоз', '', False, '', 'без пакета', day + timedelta(days=1, hours=23)),
+        ]
+        self.orders = []
+        for status, method, district, urgent, address, comment, created_at in rows:
+            order = Order.objects.create(
+                user=client, status=status, delivery_method=method, delivery_district=district,
+                is_urgent=urgent, address=address, comment=comment,
+            )
+            Order.objects.filter(pk=order.pk).update(created_at=created_at)
+            self.orders.append(order.pk)
+
+    def _list(self, **params):
+        request = APIRequestFactory().get('/api/orders/admin/', params)
+        request.tma_user = self.admin
+        return admin_order_list(request)
+
+    def _ids(self, **params):
+        response = self._list(**params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(order['id'] for order in response.data)
+
+    def test_filter_combinations(self):
+        first, second, third, fourth = self.orders
+        cases = [
+            ({'status': 'new'}, [first, second, fourth]),
+            ({'status': 'new', 'is_urgent': '1'}, [second]),
+            ({'delivery_method': 'Доставка', 'district': 'Центр'}, [first, second]),
+            ({'is_urgent': '0', 'search': 'пакет'}, [fourth]),
+            ({'search': 'ленина', 'date_from': '2026-03-10'}, [second]),
+            ({'date_from': '2026-03-10', 'date_to': '2026-03-10'}, [second, third]),
+            ({'date_to': '2026-03-09'}, [first]),
+            ({'status': 'done', 'district': 'Центр'}, []),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(self._ids(**params), sorted(expected))
+
+    def test_filters_apply_to_paginated_pages(self):
+        first, second, third, fourth = self.orders
+        response = self._list(status='new', limit='2')
+        self.assertEqual([order['id'] for order in response.data['results']], [fourth, second])
+        self.assertIsNotNone(response.data['next'])
+
+    def test_bad_dates_are_rejected(self):
+        for params in ({'date_from': '10.03.2026'}, {'date_from': '2026-02-30'}, {'date_to': 'yesterday'}):
+            with self.subTest(params=params):
+                self.assertEqual(self._list(**params).status_code, 400)
@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.chat.models import ChatRoom
+from apps.orders.creation import create_order
+from apps.orders.serializers import OrderSerializer
+from apps.products.models import Category, Product
+from apps.settings_app.cache import get_pricing_settings
+from apps.users.models import User
+
+
+class OrderCreationQueryTests(TestCase):
+    def setUp(self):
+        # Cached on first use, which would count as extra queries
+        get_pricing_settings()
+        self.user = User.objects.create(telegram_id=1, first_name='Анна')
+        # The first order of a user also opens their chat room
+        ChatRoom.objects.create(client=self.user)
+        category = Category.objects.create(name='Фрукты')
+        self.products = Product.objects.bulk_create([
+            # Cheap, so every cart stays under the free delivery threshold
+            Product(name=f'Товар {i}', category=category, price_per_kg=Decimal('1.50'))
+            for i in range(50)
+        ])
+
+    def _create(self, size):
+        data = {
+            'delivery_method': 'Курьер',
+            'items': [
+                {'product_id': product.pk, 'quantity': '1.5', 'price_type': 'kg'}
+                for product in self.products[:size]
+            ],
+        }
+        order = create_order(self.user, data)
+        return OrderSerializer(order).data
+
+    def test_query_count_does_not_depend_on_cart_size(self):
+        with CaptureQueriesContext(connection) as single:
+            self.assertEqual(len(self._create(1)['items']), 1)
+
+        with self.assertNumQueries(len(single)):
+            self.assertEqual(len(self._create(50)['items']), 50)
@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from apps.orders.views import order_list_create
+from apps.products.models import Category, Product
+from apps.users.models import User
+from utils import idempotency
+
+
+class IdempotentOrderTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(telegram_id=1)
+        category = Category.objects.create(name='Фрукты')
+        self.product = Product.objects.create(name='Яблоки', category=category, price_per_kg=Decimal('100'))
+
+    def _post(self, quantity, key='retry-1'):
+        request = APIRequestFactory().post(
+            '/api/orders/',
+            {'items': [{'product_id': self.product.pk, 'quantity': quantity, 'price_type': 'kg'}]},
+            format='json',
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+        request.tma_user = self.user
+        return order_list_create(request)
+
+    def test_key_reused_for_another_body_after_reply_is_lost(self):
+        first = self._post('2')
+        self.assertEqual(first.status_code, 201)
+        # Redis lost the stored reply, the order is found by its key
+        cache.delete(idempotency._reply_key(f'orders:{self.user.pk}', 'retry-1'))
+
+        self.assertEqual(self._post('5').status_code, 422)
+        retry = self._post('2')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data['id'], first.data['id'])
+
+    def test_stale_release_keeps_another_requests_claim(self):
+        scope = f'orders:{self.user.pk}'
+        stale, _ = idempotency.claim(scope, 'retry-2')
+        idempotency.release(scope, 'retry-2', stale)
+        owner, _ = idempotency.claim(scope, 'retry-2')
+
+        idempotency.release(scope, 'retry-2', stale)
+        with self.assertRaises(idempotency.IdempotencyConflict):
+            idempotency.claim(scope, 'retry-2', wait=0)
+        idempotency.release(scope, 'retry-2', owner)
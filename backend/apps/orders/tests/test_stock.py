@@ -0,0 +1,185 @@
+import logging
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+
+from apps.orders.creation import create_order
+from apps.orders.models import OrderItem
+from apps.orders.pricing import OrderError
+from apps.orders.status import change_status
+from apps.products.models import Category, Product, ProductStock
+from apps.users.models import User
+
+CLIENTS = 12
+ORDERS_PER_CLIENT = 8
+STOCK = Decimal('40')
+
+logger = logging.getLogger(__name__)
+
+
+def _held(product):
+    return OrderItem.objects.filter(product=product).aggregate(total=Sum('reserved'))['total'] or Decimal('0')
+
+
+class ConcurrentReservationTests(TransactionTestCase):
+    """Many clients order the same products at once, each with its own connection."""
+
+    def setUp(self):
+        category = Category.objects.create(name='Фрукты')
+        self.products = [
+            Product.objects.create(name=f'Товар {i}', category=category, price_per_kg=Decimal('100'))
+            for i in range(2)
+        ]
+        ProductStock.objects.bulk_create([
+            ProductStock(product=product, price_type='kg', quantity=STOCK) for product in self.products
+        ])
+        self.users = User.objects.bulk_create([User(telegram_id=1000 + i) for i in range(CLIENTS)])
+
+    def _order_concurrently(self):
+        latencies, placed, deadlocks, errors = [], [], [], []
+        barrier = threading.Barrier(len(self.users))
+
+        def client(user):
+            try:
+                barrier.wait()
+                for _ in range(ORDERS_PER_CLIENT):
+                    # Carts list the products in different orders
+                    cart = [
+                        {'product_id': product.pk, 'quantity': random.choice(('0.5', '1', '2')), 'price_type': 'kg'}
+                        for product in self.products
+                    ]
+                    random.shuffle(cart)
+                    started = time.perf_counter()
+                    try:
+                        placed.append(create_order(user, {'items': cart}, notify=False).pk)
+                    except OrderError:
+                        pass
+                    except OperationalError as e:
+                        deadlocks.append(e)
+                    latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=client, args=(user,)) for user in self.users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(deadlocks, [])
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        # Timing depends on the machine: reported, not asserted
+        logger.info('p95 order latency %.3f s over %d orders', p95, len(latencies))
+        return placed
+
+    def assertStockBalanced(self):
+        for product in self.products:
+            left = ProductStock.objects.get(product=product).quantity
+            self.assertGreaterEqual(left, 0)
+            self.assertEqual(left + _held(product), STOCK)
+
+    def test_no_oversell_or_deadlock(self):
+        placed = self._order_concurrently()
+
+        self.assertTrue(placed)
+        self.assertStockBalanced()
+        # Demand is well above the stock, so it runs out
+        for product in self.products:
+            product.refresh_from_db()
+            left = ProductStock.objects.get(product=product).quantity
+            self.assertEqual(product.in_stock, left > 0)
+
+    def test_cancelling_gives_stock_back_once(self):
+        placed = self._order_concurrently()
+
+        change_status(placed[::2], 'cancelled')
+        change_status(placed[::2], 'cancelled')
+        self.assertStockBalanced()
+        for product in self.products:
+            product.refresh_from_db()
+            self.assertTrue(product.in_stock)
+
+
+class ReservationTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Фрукты')
+        self.product = Product.objects.create(
+            name='Яблоки', category=category,
+            price_per_kg=Decimal('100'), price_per_100g=Decimal('12'),
+        )
+        self.stock = ProductStock.objects.create(product=self.product, price_type='kg', quantity=Decimal('20'))
+        self.user = User.objects.create(telegram_id=1)
+
+    def _order(self, *items):
+        return create_order(self.user, {'items': [{'product_id': self.product.pk, **item} for item in items]}, notify=False)
+
+    def test_rejects_non_positive_quantities(self):
+        for item in (
+            {'quantity': '0', 'price_type': 'kg'},
+            {'quantity': '-9', 'price_type': 'kg'},
+            {'quantity': '1', 'price_type': 'gram'},
+            {'quantity': '1', 'price_type': 'gram', 'selected_grams': -500},
+        ):
+            with self.subTest(item=item), self.assertRaises(OrderError):
+                self._order({'quantity': '10', 'price_type': 'kg'}, item)
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity, Decimal('20'))
+
+    def test_items_record_what_they_took(self):
+        order = self._order(
+            {'quantity': '2', 'price_type': 'kg'},
+            {'quantity': '3', 'price_type': 'gram', 'selected_grams': 500},
+        )
+
+        self.assertEqual(
+            sorted(order.items.values_list('reserved', flat=True)),
+            [Decimal('1.5'), Decimal('2')],
+        )
+        change_status([order.pk], 'cancelled')
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity, Decimal('20'))
+
+    def test_cancelled_orders_cannot_be_reopened(self):
+        order = self._order({'quantity': '5', 'price_type': 'kg'})
+        change_status([order.pk], 'cancelled')
+
+        with self.assertRaises(OrderError):
+            change_status([order.pk], 'new')
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'cancelled')
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity, Decimal('20'))
+
+    def test_untracked_price_type_keeps_product_on_sale(self):
+        self.product.price_per_unit = Decimal('30')
+        self.product.save()
+
+        self._order({'quantity': '20', 'price_type': 'kg'})
+        self.product.refresh_from_db()
+        self.assertTrue(self.product.in_stock)
+
+    def test_restock_only_brings_back_what_stock_took_off(self):
+        order = self._order({'quantity': '20', 'price_type': 'kg'})
+        self.product.refresh_from_db()
+        self.assertFalse(self.product.in_stock)
+
+        change_status([order.pk], 'cancelled')
+        self.product.refresh_from_db()
+        self.assertTrue(self.product.in_stock)
+
+        # Taken off sale by hand: stock coming back doesn't override that
+        self.product.in_stock = False
+        self.product.save()
+        self.stock.quantity = Decimal('50')
+        self.stock.save()
+        self.product.refresh_from_db()
+        self.assertFalse(self.product.in_stock)
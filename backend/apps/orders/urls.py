@@ -3,8 +3,12 @@ from apps.orders import views
 
 urlpatterns = [
     path('', views.order_list_create, name='order-list-create'),
+    path('quote/', views.order_quote, name='order-quote'),
     path('<int:pk>/', views.order_detail, name='order-detail'),
     path('admin/', views.admin_order_list, name='admin-order-list'),
+    path('admin/events/', views.admin_order_events, name='admin-order-events'),
+    path('admin/export.<str:fmt>', views.admin_order_export, name='admin-order-export'),
+    path('admin/jobs/<int:pk>/', views.admin_notification_job, name='admin-notification-job'),
     path('admin/bulk/', views.admin_order_bulk, name='admin-order-bulk'),
     path('admin/<int:pk>/', views.admin_order_update, name='admin-order-update'),
 ]
@@ -1,192 +1,133 @@
-import os
-import asyncio
 import logging
-from decimal import Decimal
 
-from django.conf import settings as django_settings
+from django.db import IntegrityError, connection
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
-from apps.orders.models import Order, OrderItem
+from apps.bot.models import OutboxJob
+from apps.orders import events, export
+from apps.orders.creation import create_order
+from apps.orders.filters import filter_orders
+from apps.orders.models import Order
+from apps.orders.pricing import OrderError, PricingEngine
 from apps.orders.serializers import (
     OrderSerializer,
     OrderCreateSerializer,
+    OrderQuoteSerializer,
     OrderStatusSerializer,
+    OrderSummarySerializer,
+    QuoteSerializer,
 )
-from apps.products.models import Product
-from apps.users.models import User
-from apps.settings_app.models import ShopSettings, DeliveryMethod
-from apps.chat.models import ChatRoom
+from apps.orders.status import change_status
+from utils import idempotency, xlsx
+from utils.pagination import KeysetPaginator
 
 logger = logging.getLogger(__name__)
 
-PRICE_TYPE_LABELS = {
-    'kg': 'кг', 'gram': 'г', 'box': 'ящ', 'pack': 'уп', 'unit': 'шт',
-}
-
-
-def _notify_admins_new_order(order):
-    """Send Telegram notification to admins about a new order with inline button."""
-    try:
-        import telegram
-        bot = telegram.Bot(token=django_settings.TELEGRAM_BOT_TOKEN)
-        admins = User.objects.filter(is_admin=True)
-
-        # Build items list
-        items_lines = []
-        for item in order.items.all():
-            unit = PRICE_TYPE_LABELS.get(item.price_type, '')
-            qty_str = f"{item.quantity:.0f}" if item.quantity == int(item.quantity) else f"{item.quantity}"
-            items_lines.append(f"  • {item.product_name} — {qty_str} {unit} × {item.price:.0f} ₽")
-
-        items_text = '\n'.join(items_lines) if items_lines else '  (нет товаров)'
-
-        text = (
-            f"🛒 Новый заказ #{order.id}\n\n"
-            f"👤 {order.user.display_name}\n"
-            f"💰 Сумма: {order.total:.0f} ₽\n"
-            f"🚚 {order.delivery_method or '—'}\n"
-            f"💳 {order.payment_method or '—'}\n\n"
-            f"Товары:\n{items_text}"
-        )
-        if order.address:
-            text += f"\n\n📍 {order.address}"
-        if order.comment:
-            text += f"\n\n💬 {order.comment}"
-
-        # Ensure chat room exists for this client
-        chat_room, _ = ChatRoom.objects.get_or_create(client=order.user)
-
-        domain = os.environ.get('DOMAIN') or (django_settings.ALLOWED_HOSTS[0] if django_settings.ALLOWED_HOSTS else 'localhost')
-        webapp_url = f'https://{domain}?v=2'
-
-        keyboard = telegram.InlineKeyboardMarkup([
-            [telegram.InlineKeyboardButton(
-                text='📦 Открыть магазин',
-                web_app=telegram.WebAppInfo(url=webapp_url),
-            )],
-            [telegram.InlineKeyboardButton(
-                text='💬 Чат с клиентом',
-                web_app=telegram.WebAppInfo(url=f'{webapp_url}/admin/chat?room={chat_room.id}'),
-            )],
-        ])
-
-        for admin in admins:
-            try:
-                asyncio.get_event_loop().run_until_complete(
-                    bot.send_message(
-                        chat_id=admin.telegram_id,
-                        text=text,
-                        reply_markup=keyboard,
-                    )
-                )
-            except Exception as e:
-                logger.warning(f'Failed to notify admin {admin.telegram_id}: {e}')
-    except Exception as e:
-        logger.warning(f'Failed to send order notification: {e}')
-
 
 @api_view(['GET', 'POST'])
 def order_list_create(request):
-    """List user's orders or create a new one."""
+    """List user's orders or create a new one.
+
+    The list holds summaries only; items come from order_detail.
+    Pass ?limit= and/or ?cursor= to get a keyset-paginated page
+    ({"results": [...], "next": cursor}) instead of the full list.
+    """
     if request.method == 'GET':
-        orders = Order.objects.filter(user=request.tma_user).prefetch_related('items')
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data)
+        orders = Order.objects.filter(user=request.tma_user).only(*OrderSummarySerializer.Meta.fields)
+        if KeysetPaginator.is_requested(request):
+            paginator = KeysetPaginator(request)
+            page = paginator.paginate_queryset(orders)
+            return Response(paginator.get_paginated_data(OrderSummarySerializer(page, many=True).data))
+        return Response(OrderSummarySerializer(orders, many=True).data)
 
     # Create order
+    key = request.headers.get(idempotency.HEADER)
+    if key is not None:
+        return _create_order_once(request, key)
+
     serializer = OrderCreateSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    data = serializer.validated_data
-
-    # Calculate delivery cost
-    shop_settings = ShopSettings.load()
-    delivery_method_name = data.get('delivery_method', '')
-    is_urgent = data.get('is_urgent', False)
-
-    order = Order.objects.create(
-        user=request.tma_user,
-        delivery_method=delivery_method_name,
-        delivery_district=data.get('delivery_district', ''),
-        delivery_interval=data.get('delivery_interval', ''),
-        is_urgent=is_urgent,
-        payment_method=data.get('payment_method', ''),
-        address=data.get('address', ''),
-        comment=data.get('comment', ''),
-        promo_code=data.get('promo_code', ''),
-    )
-
-    total = Decimal('0')
-    for item_data in data['items']:
-        product_id = item_data.get('product_id')
-        quantity = Decimal(str(item_data.get('quantity', 1)))
-        price_type = item_data.get('price_type', 'kg')
-
-        try:
-            product = Product.objects.get(pk=product_id)
-        except Product.DoesNotExist:
-            order.delete()
-            return Response({'error': f'Product {product_id} not found'}, status=400)
-
-        # Get price based on type
-        if price_type == 'gram':
-            # For gram type, calculate price from price_per_100g * selected_grams / 100
-            selected_grams = item_data.get('selected_grams', 0)
-            if product.price_per_100g and selected_grams:
-                price = product.price_per_100g * Decimal(str(selected_grams)) / Decimal('100')
-            else:
-                price = product.main_price
-            product_name = f"{product.name} ({selected_grams}г)"
-        else:
-            price_map = {
-                'kg': product.price_per_kg,
-                'box': product.price_per_box,
-                'pack': product.price_per_pack,
-                'unit': product.price_per_unit,
-            }
-            price = price_map.get(price_type)
-            if price is None:
-                # Fallback to main price
-                price = product.main_price
-            product_name = product.name
-
-        OrderItem.objects.create(
-            order=order,
-            product=product,
-            product_name=product_name,
-            quantity=quantity,
-            price_type=price_type,
-            price=price,
-        )
-        total += price * quantity
-
-    # Calculate delivery price
-    delivery_price = Decimal('0')
-    if total < shop_settings.free_delivery_threshold:
-        try:
-            dm = DeliveryMethod.objects.get(name=delivery_method_name, is_active=True)
-            delivery_price = dm.price
-        except DeliveryMethod.DoesNotExist:
-            pass
+    try:
+        order = create_order(request.tma_user, serializer.validated_data)
+    except OrderError as e:
+        return Response({'error': str(e)}, status=400)
+
+    data = OrderSerializer(order).data
+    events.publish(events.ORDER_CREATED, data)
+    return Response(data, status=status.HTTP_201_CREATED)
+
+
+def _create_order_once(request, key):
+    """
+    Create an order at most once per Idempotency-Key.
+    Retries get the stored reply from Redis without querying orders; if
+    Redis lost it, the order is found by its key instead of created again.
+    Either way a different body under the same key gets a 422.
+    """
+    if not key or len(key) > idempotency.MAX_KEY_LENGTH:
+        return Response({'error': 'Invalid Idempotency-Key'}, status=400)
+
+    user = request.tma_user
+    scope = f'orders:{user.pk}'
+    fingerprint = idempotency.fingerprint(request.data)
+    try:
+        token, reply = idempotency.claim(scope, key)
+    except idempotency.IdempotencyConflict:
+        return Response({'error': 'A request with this Idempotency-Key is in progress'}, status=409)
 
-    # Calculate urgency surcharge
-    urgency_amount = Decimal('0')
-    if is_urgent and shop_settings.urgency_surcharge > 0:
-        urgency_amount = shop_settings.urgency_surcharge
+    if reply is not None:
+        if reply['fingerprint'] != fingerprint:
+            return Response({'error': 'Idempotency-Key was used for a different request'}, status=422)
+        return Response(reply['data'], status=reply['status'])
 
-    order.delivery_price = delivery_price
-    order.urgency_surcharge = urgency_amount
-    order.total = total + delivery_price + urgency_amount
-    order.save(update_fields=['total', 'delivery_price', 'urgency_surcharge'])
+    try:
+        order = Order.objects.prefetch_related('items').filter(user=user, idempotency_key=key).first()
+        created = order is None
+        if created:
+            serializer = OrderCreateSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            try:
+                order = create_order(
+                    user, serializer.validated_data,
+                    idempotency_key=key, idempotency_fingerprint=fingerprint,
+                )
+            except OrderError as e:
+                # Nothing was written, a retry may run again
+                return Response({'error': str(e)}, status=400)
+            except IntegrityError:
+                # Created meanwhile by a request that outlived its claim
+                order = Order.objects.prefetch_related('items').get(user=user, idempotency_key=key)
+                created = False
+
+        # Orders from before fingerprints were stored have none to compare
+        if not created and order.idempotency_fingerprint not in ('', fingerprint):
+            return Response({'error': 'Idempotency-Key was used for a different request'}, status=422)
+
+        data = OrderSerializer(order).data
+        if created:
+            events.publish(events.ORDER_CREATED, data)
+        idempotency.store(scope, key, fingerprint, status.HTTP_201_CREATED, data)
+        return Response(data, status=status.HTTP_201_CREATED)
+    finally:
+        idempotency.release(scope, key, token)
 
-    # Notify admins via Telegram
-    _notify_admins_new_order(order)
 
-    return Response(
-        OrderSerializer(order).data,
-        status=status.HTTP_201_CREATED,
-    )
+@api_view(['POST'])
+def order_quote(request):
+    """Price a cart the way an order would be priced. Writes nothing."""
+    serializer = OrderQuoteSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    try:
+        quote = PricingEngine().quote(data['items'], data['delivery_method'], data['is_urgent'])
+    except OrderError as e:
+        return Response({'error': str(e)}, status=400)
+    return Response(QuoteSerializer(quote).data)
 
 
 @api_view(['GET'])
@@ -204,21 +145,91 @@ def order_detail(request, pk):
 
 @api_view(['GET'])
 def admin_order_list(request):
-    """Admin: list all orders."""
+    """Admin: list all orders.
+
+    Filters: status, delivery_method, district, interval, is_urgent,
+    date_from, date_to, search (see apps.orders.filters).
+    Pass ?limit= and/or ?cursor= to get a keyset-paginated page
+    ({"results": [...], "next": cursor}) instead of the full list.
+    """
     if not request.tma_user.is_admin:
         return Response({'error': 'Forbidden'}, status=403)
 
-    qs = Order.objects.select_related('user').prefetch_related('items').all()
+    qs = Order.objects.select_related('user').prefetch_related('items')
+    qs = filter_orders(qs, request.query_params)
 
-    # Filter by status
-    order_status = request.query_params.get('status')
-    if order_status:
-        qs = qs.filter(status=order_status)
+    if KeysetPaginator.is_requested(request):
+        paginator = KeysetPaginator(request)
+        page = paginator.paginate_queryset(qs)
+        return Response(paginator.get_paginated_data(OrderSerializer(page, many=True).data))
 
     serializer = OrderSerializer(qs, many=True)
     return Response(serializer.data)
 
 
+EXPORT_FORMATS = {
+    'csv': (export.stream_csv, 'text/csv; charset=utf-8'),
+    'xlsx': (export.stream_xlsx, xlsx.CONTENT_TYPE),
+}
+
+
+@api_view(['GET'])
+def admin_order_export(request, fmt):
+    """Admin: download orders as CSV or XLSX, one row per item.
+
+    Takes the same filters as the admin order list. The file is streamed
+    while orders are read, so any date range fits in memory.
+    """
+    if not request.tma_user.is_admin:
+        return Response({'error': 'Forbidden'}, status=403)
+    if fmt not in EXPORT_FORMATS:
+        return Response({'error': f'Unsupported format: {fmt}'}, status=400)
+
+    qs = filter_orders(Order.objects.all(), request.query_params)
+    stream, content_type = EXPORT_FORMATS[fmt]
+    response = StreamingHttpResponse(stream(export.export_rows(qs)), content_type=content_type)
+    filename = f'orders-{timezone.localdate():%Y-%m-%d}.{fmt}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@require_GET
+def admin_order_events(request):
+    """Admin: Server-Sent Events stream of order changes (see apps.orders.events).
+
+    A plain Django view: DRF would answer Accept: text/event-stream with 406.
+    """
+    if not request.tma_user or not request.tma_user.is_admin:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid Last-Event-ID'}, status=400)
+
+    user_id = request.tma_user.id
+    token = events.acquire_stream(user_id)
+    if token is None:
+        response = JsonResponse({'error': 'Too many open event streams'}, status=429)
+        response['Retry-After'] = str(events.RETRY // 1000)
+        return response
+
+    def stream():
+        # The stream only reads Redis: the DB connection is not held meanwhile
+        connection.close()
+        try:
+            yield from events.stream(last_id)
+        finally:
+            events.release_stream(user_id, token)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Tells nginx to pass events through instead of buffering them
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @api_view(['PATCH'])
 def admin_order_update(request, pk):
     """Admin: update order status."""
@@ -232,8 +243,11 @@ def admin_order_update(request, pk):
 
     serializer = OrderStatusSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    order.status = serializer.validated_data['status']
-    order.save(update_fields=['status'])
+    try:
+        change_status([order.id], serializer.validated_data['status'])
+    except OrderError as e:
+        return Response({'error': str(e)}, status=400)
+    order.refresh_from_db(fields=['status', 'updated_at'])
 
     return Response(OrderSerializer(order).data)
 
@@ -254,5 +268,29 @@ def admin_order_bulk(request):
     if new_status not in valid_statuses:
         return Response({'error': f'Invalid status: {new_status}'}, status=400)
 
-    updated = Order.objects.filter(id__in=ids).update(status=new_status)
-    return Response({'updated': updated})
+    try:
+        ids = [int(pk) for pk in ids]
+    except (TypeError, ValueError):
+        return Response({'error': 'ids must be order ids'}, status=400)
+
+    try:
+        changed, job = change_status(
+            ids, new_status, job_description=f'Статус заказов: {dict(Order.STATUS_CHOICES)[new_status]}',
+        )
+    except OrderError as e:
+        return Response({'error': str(e)}, status=400)
+    # Client notifications are sent in the background, follow them by job id
+    return Response({'updated': len(changed), 'job': job.pk if job else None})
+
+
+@api_view(['GET'])
+def admin_notification_job(request, pk):
+    """Admin: progress of the client notifications queued by a bulk change."""
+    if not request.tma_user.is_admin:
+        return Response({'error': 'Forbidden'}, status=403)
+
+    try:
+        job = OutboxJob.objects.get(pk=pk)
+    except OutboxJob.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=404)
+    return Response(job.progress())
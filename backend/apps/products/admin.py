@@ -1,5 +1,5 @@
 from django.contrib import admin
-from apps.products.models import Category, Product, ProductImage
+from apps.products.models import Category, Product, ProductImage, ProductStock
 
 
 class ProductImageInline(admin.TabularInline):
@@ -7,6 +7,12 @@ class ProductImageInline(admin.TabularInline):
     extra = 1
 
 
+class ProductStockInline(admin.TabularInline):
+    model = ProductStock
+    extra = 0
+    readonly_fields = ['updated_at']
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'sort_order', 'is_active']
@@ -18,4 +24,4 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = ['name', 'category', 'tag', 'in_stock', 'price_per_kg']
     list_filter = ['category', 'tag', 'in_stock']
     search_fields = ['name']
-    inlines = [ProductImageInline]
+    inlines = [ProductStockInline, ProductImageInline]
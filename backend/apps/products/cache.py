@@ -0,0 +1,34 @@
+"""
+Catalog cache.
+Public catalog responses are cached per catalog version; any change to
+categories, products or product images bumps the version.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from utils.cache import bump_version, get_or_build
+
+CATALOG_NAMESPACE = 'catalog'
+
+
+def catalog_params(request, *names) -> dict:
+    """Normalize the query params that affect a catalog response."""
+    params = {name: request.query_params.get(name, '').strip() for name in names}
+    if 'in_stock' in params:
+        params['in_stock'] = '1' if params['in_stock'] == '1' else ''
+    # Media URLs are absolute, so responses differ per host
+    params['origin'] = request.build_absolute_uri('/')
+    return params
+
+
+def get_cached_catalog(name: str, params: dict, builder):
+    """Return a cached catalog response body, building it on a miss."""
+    return get_or_build(
+        CATALOG_NAMESPACE, name, params, builder,
+        timeout=settings.CATALOG_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_catalog():
+    """Bump the catalog version once the current transaction commits."""
+    transaction.on_commit(lambda: bump_version(CATALOG_NAMESPACE))
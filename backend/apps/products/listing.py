@@ -0,0 +1,104 @@
+"""
+Fast product list rendering.
+Produces exactly what ProductListSerializer does, but from a .values()
+projection: no model instances, no per-field DRF machinery and one URL
+prefix per request instead of build_absolute_uri per row.
+"""
+from decimal import Decimal
+
+from django.core.files.storage import default_storage
+from django.utils.encoding import filepath_to_uri
+
+PRICE_FIELDS = (
+    'price_per_kg', 'price_per_unit', 'price_per_pack', 'price_per_box',
+    'price_per_100g',
+)
+OLD_PRICE_FIELDS = (
+    'old_price_per_kg', 'old_price_per_box', 'old_price_per_pack',
+    'old_price_per_unit', 'old_price_per_100g',
+)
+DECIMAL_FIELDS = PRICE_FIELDS + OLD_PRICE_FIELDS
+
+# Columns read from the database; created_at is only used for paging
+LIST_COLUMNS = (
+    'id', 'name', 'category', 'category__name',
+    *PRICE_FIELDS, 'available_grams', 'box_weight', 'pack_weight',
+    *OLD_PRICE_FIELDS, 'tag', 'in_stock',
+    'cover_image__image', 'cover_image__image_sizes',
+    'cover_image__image_placeholder', 'created_at',
+)
+
+CENTS = Decimal('0.01')
+
+
+def project_products(qs, *extra):
+    """Narrow a product queryset to the columns a list row needs, plus `extra`."""
+    return qs.values(*LIST_COLUMNS, *extra)
+
+
+def media_prefix(request) -> str:
+    """Absolute URL prefix for stored media, computed once per request."""
+    base_url = default_storage.base_url
+    return request.build_absolute_uri(base_url) if request else base_url
+
+
+def media_url(name: str, prefix: str) -> str:
+    """URL of a stored file, same as default_storage.url() under the prefix."""
+    return prefix + filepath_to_uri(name).lstrip('/')
+
+
+def render_image_sizes(sizes, prefix: str) -> list:
+    """Turn stored derivative names into [{'width', 'webp', 'jpeg'}] URLs."""
+    return [
+        {
+            'width': size['width'],
+            'webp': media_url(size['webp'], prefix),
+            'jpeg': media_url(size['jpeg'], prefix),
+        }
+        for size in sizes or []
+    ]
+
+
+def _format_decimal(value):
+    # Same output as DRF's DecimalField(decimal_places=2)
+    if value is None:
+        return None
+    return f'{value.quantize(CENTS):f}'
+
+
+def render_product_rows(rows, prefix: str) -> list:
+    """Turn projected rows into ProductListSerializer-shaped dicts."""
+    data = []
+    for row in rows:
+        prices = {field: _format_decimal(row[field]) for field in DECIMAL_FIELDS}
+        image = row['cover_image__image']
+        data.append({
+            'id': row['id'],
+            'name': row['name'],
+            'category': row['category'],
+            'category_name': row['category__name'],
+            'price_per_kg': prices['price_per_kg'],
+            'price_per_unit': prices['price_per_unit'],
+            'price_per_pack': prices['price_per_pack'],
+            'price_per_box': prices['price_per_box'],
+            'price_per_100g': prices['price_per_100g'],
+            'available_grams': row['available_grams'],
+            'box_weight': row['box_weight'],
+            'pack_weight': row['pack_weight'],
+            'old_price_per_kg': prices['old_price_per_kg'],
+            'old_price_per_box': prices['old_price_per_box'],
+            'old_price_per_pack': prices['old_price_per_pack'],
+            'old_price_per_unit': prices['old_price_per_unit'],
+            'old_price_per_100g': prices['old_price_per_100g'],
+            'tag': row['tag'],
+            'in_stock': row['in_stock'],
+            'main_image': media_url(image, prefix) if image else None,
+            'main_image_sizes': render_image_sizes(row['cover_image__image_sizes'], prefix) if image else [],
+            'main_image_placeholder': row['cover_image__image_placeholder'] if image else '',
+        })
+    return data
+
+
+def render_product_list(qs, request) -> list:
+    """Render a product queryset as the public product list."""
+    return render_product_rows(project_products(qs), media_prefix(request))
@@ -0,0 +1,286 @@
+"""
+Image pipeline benchmark suite.
+Runs compress_image and the old full-decode pipeline over a generated,
+seeded corpus (huge JPEGs, PNG with alpha, palette, grayscale, rotated
+and already-small images). Every run happens in a fresh process so peak
+memory is measured per image. Reports wall time, peak RSS, tracemalloc
+peak, output size and SSIM against a full-quality reference.
+
+    python manage.py bench_images --output bench/images.json
+    python manage.py bench_images --compare bench/images.json --strict
+
+Judge any change to utils/images.py against a saved run.
+"""
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import PIL
+from PIL import Image, ImageDraw, ImageMath, ImageOps
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.images import JPEG_QUALITY, MAX_DIMENSION, _to_rgb, compress_image
+
+SEED = 1234
+
+# name -> (width, height, format, mode)
+CORPUS = {
+    'jpeg_12mp': (4000, 3000, 'JPEG', 'RGB'),
+    'jpeg_48mp': (8000, 6000, 'JPEG', 'RGB'),
+    'jpeg_rotated': (4000, 3000, 'JPEG', 'RGB'),
+    'png_alpha': (3000, 2000, 'PNG', 'RGBA'),
+    'palette': (2000, 1500, 'PNG', 'P'),
+    'grayscale': (3000, 2000, 'JPEG', 'L'),
+    'small_jpeg': (800, 600, 'JPEG', 'RGB'),
+}
+
+# A result is a regression when it is worse than the baseline by more than this
+TOLERANCE = {'time': 1.2, 'rss': 1.2, 'output_bytes': 1.05, 'ssim': 0.01}
+
+
+def full_decode_compress(file):
+    """The previous pipeline: decode everything, then resize with LANCZOS."""
+    img = _to_rgb(Image.open(file))
+    w, h = img.size
+    if max(w, h) > MAX_DIMENSION:
+        if w > h:
+            img = img.resize((MAX_DIMENSION, int(h * MAX_DIMENSION / w)), Image.LANCZOS)
+        else:
+            img = img.resize((int(w * MAX_DIMENSION / h), MAX_DIMENSION), Image.LANCZOS)
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def draft_compress(file):
+    return compress_image(File(file, name=os.path.basename(file.name))).read()
+
+
+PIPELINES = {'full decode': full_decode_compress, 'compress_image': draft_compress}
+
+
+def _read_status(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) * 1024
+    return None
+
+
+def _measure(pipeline, path):
+    """Run one pipeline on one file. Runs in a fresh child process."""
+    try:
+        # Reset the peak RSS counter (Linux only)
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        rss_before = _read_status('VmRSS:')
+    except OSError:
+        rss_before = None
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        output = PIPELINES[pipeline](f)
+    elapsed = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rss_peak = _read_status('VmHWM:') - rss_before if rss_before is not None else None
+    return {'time': elapsed, 'rss': rss_peak, 'traced': traced_peak, 'output': output}
+
+
+def _multiply(a, b):
+    """Pixel-wise product of two mode F images."""
+    if hasattr(ImageMath, 'lambda_eval'):
+        return ImageMath.lambda_eval(lambda args: args['a'] * args['b'], a=a, b=b)
+    # Pillow before 10.3
+    return ImageMath.eval('a * b', a=a, b=b)
+
+
+def ssim(reference, image) -> float:
+    """
+    Mean SSIM of two same-sized images over 8x8 blocks of luminance.
+    Block statistics come from BOX downscales, so this stays fast in
+    pure Python.
+    """
+    x = reference.convert('L').convert('F')
+    y = image.convert('L').convert('F')
+    blocks = (max(1, x.width // 8), max(1, x.height // 8))
+
+    def mean(img):
+        return list(img.resize(blocks, Image.BOX).getdata())
+
+    mu_x, mu_y = mean(x), mean(y)
+    xx, yy, xy = mean(_multiply(x, x)), mean(_multiply(y, y)), mean(_multiply(x, y))
+
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    total = 0.0
+    for mx, my, sxx, syy, sxy in zip(mu_x, mu_y, xx, yy, xy):
+        var_x, var_y, cov = sxx - mx * mx, syy - my * my, sxy - mx * my
+        total += ((2 * mx * my + c1) * (2 * cov + c2)) / ((mx * mx + my * my + c1) * (var_x + var_y + c2))
+    return total / len(mu_x)
+
+
+def _reference(path, size):
+    """The source decoded at full quality and resized to the output size."""
+    img = Image.open(path)
+    img = _to_rgb(ImageOps.exif_transpose(img))
+    return img.resize(size, Image.LANCZOS)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the image pipeline over a generated corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cases', nargs='+', choices=list(CORPUS), default=list(CORPUS))
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--output', help='Save results as JSON')
+        parser.add_argument('--compare', help='JSON of an earlier run to compare with')
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Fail when a result regressed against --compare',
+        )
+
+    def handle(self, *args, **options):
+        # Fresh interpreters: forked children would reuse pages the parent already touched
+        context = multiprocessing.get_context('spawn')
+        results = []
+        with tempfile.TemporaryDirectory() as directory:
+            for case in options['cases']:
+                path = self._make_image(directory, case)
+                for pipeline in PIPELINES:
+                    runs = []
+                    for _ in range(options['repeat']):
+                        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                            runs.append(pool.submit(_measure, pipeline, path).result())
+                    best = min(runs, key=lambda run: run['time'])
+
+                    output = Image.open(io.BytesIO(best['output']))
+                    result = {
+                        'case': case,
+                        'pipeline': pipeline,
+                        'time': round(best['time'], 4),
+                        'rss': best['rss'],
+                        'traced': best['traced'],
+                        'input_bytes': os.path.getsize(path),
+                        'output_bytes': len(best['output']),
+                        'output_size': list(output.size),
+                        'ssim': round(ssim(_reference(path, output.size), output), 4),
+                    }
+                    results.append(result)
+                    self._print(result)
+
+        if options['output']:
+            os.makedirs(os.path.dirname(os.path.abspath(options['output'])), exist_ok=True)
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'commit': _git_commit(),
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'python': platform.python_version(),
+                    'pillow': PIL.__version__,
+                    'results': results,
+                }, f, indent=2)
+            self.stdout.write(f'Saved to {options["output"]}')
+
+        if options['compare']:
+            regressions = self._compare(options['compare'], results)
+            if regressions and options['strict']:
+                raise CommandError(f'{regressions} regressions against {options["compare"]}')
+
+    def _print(self, result):
+        self.stdout.write(
+            f'{result["case"]:<13} {result["pipeline"]:<15} '
+            f'{result["time"] * 1000:7.0f} ms  '
+            f'RSS {self._mb(result["rss"]):>9}  traced {self._mb(result["traced"]):>8}  '
+            f'{result["input_bytes"] / 1024:8.0f} -> {result["output_bytes"] / 1024:5.0f} KB  '
+            f'{result["output_size"][0]}x{result["output_size"][1]}  SSIM {result["ssim"]:.4f}'
+        )
+
+    def _compare(self, path, results) -> int:
+        with open(path) as f:
+            baseline = json.load(f)
+        previous = {(r['case'], r['pipeline']): r for r in baseline['results']}
+        self.stdout.write(f'Compared with {baseline.get("commit") or path}:')
+
+        regressions = 0
+        for result in results:
+            old = previous.get((result['case'], result['pipeline']))
+            if old is None:
+                continue
+            worse = [
+                metric for metric in ('time', 'rss', 'output_bytes')
+                if old[metric] and result[metric] and result[metric] > old[metric] * TOLERANCE[metric]
+            ]
+            if result['ssim'] < old['ssim'] - TOLERANCE['ssim']:
+                worse.append('ssim')
+            regressions += bool(worse)
+            status = self.style.ERROR('REGRESSION: ' + ', '.join(worse)) if worse else 'ok'
+            self.stdout.write(
+                f'  {result["case"]:<13} {result["pipeline"]:<15} '
+                f'time x{result["time"] / old["time"]:.2f}  '
+                f'size x{result["output_bytes"] / old["output_bytes"]:.2f}  '
+                f'SSIM {result["ssim"] - old["ssim"]:+.4f}  {status}'
+            )
+        return regressions
+
+    @staticmethod
+    def _mb(value):
+        return 'n/a' if value is None else f'{value / 1024 / 1024:.1f} MB'
+
+    @staticmethod
+    def _make_image(directory, case):
+        """A deterministic photo-like image: gradient, shapes and smooth noise."""
+        width, height, fmt, mode = CORPUS[case]
+        rng = random.Random(f'{SEED}:{case}')
+
+        img = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+        draw = ImageDraw.Draw(img)
+        for _ in range(40):
+            x, y = rng.randrange(width), rng.randrange(height)
+            r = rng.randrange(width // 40, width // 6)
+            color = tuple(rng.randrange(256) for _ in range(3))
+            draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+
+        # Fine texture so the encoder has real detail to keep
+        small = (max(1, width // 4), max(1, height // 4))
+        noise = Image.frombytes('RGB', small, rng.randbytes(small[0] * small[1] * 3))
+        img = Image.blend(img, noise.resize((width, height), Image.BICUBIC), 0.15)
+
+        if mode == 'RGBA':
+            alpha = Image.linear_gradient('L').rotate(90).resize((width, height))
+            img.putalpha(alpha)
+        elif mode == 'P':
+            img = img.quantize(colors=64)
+        elif mode == 'L':
+            img = img.convert('L')
+
+        options = {}
+        if fmt == 'JPEG':
+            options['quality'] = 75 if case == 'small_jpeg' else 92
+        if case == 'jpeg_rotated':
+            exif = img.getexif()
+            exif[0x0112] = 6  # rotate 90 degrees clockwise on display
+            options['exif'] = exif
+
+        path = os.path.join(directory, f'{case}.{fmt.lower()}')
+        img.save(path, format=fmt, **options)
+        return path
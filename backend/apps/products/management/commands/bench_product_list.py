@@ -0,0 +1,87 @@
+"""
+Benchmark product list rendering: ProductListSerializer vs the values() path.
+Creates throwaway products inside a transaction that is rolled back.
+
+    python manage.py bench_product_list --sizes 1000 10000
+"""
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from apps.products.listing import render_product_list
+from apps.products.models import Category, Product, ProductImage
+from apps.products.serializers import ProductListSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare ProductListSerializer with the fast values() list rendering'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/api/products/')
+        for size in options['sizes']:
+            with transaction.atomic():
+                self._seed(size)
+                qs = Product.objects.filter(name__startswith='bench-')
+
+                serializer_time, serializer_body = self._measure(options['repeat'], lambda: JSONRenderer().render(
+                    ProductListSerializer(
+                        qs.select_related('category', 'cover_image'),
+                        many=True, context={'request': request},
+                    ).data
+                ))
+                fast_time, fast_body = self._measure(options['repeat'], lambda: JSONRenderer().render(
+                    render_product_list(qs, request)
+                ))
+                transaction.set_rollback(True)
+
+            if serializer_body != fast_body:
+                raise CommandError(f'Outputs differ for {size} products')
+
+            self.stdout.write(
+                f'{size:>6} products: serializer {serializer_time * 1000:8.1f} ms, '
+                f'values() {fast_time * 1000:8.1f} ms, '
+                f'x{serializer_time / fast_time:.1f}, {len(fast_body)} bytes'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Outputs are byte-identical'))
+
+    def _seed(self, size):
+        category = Category.objects.create(name='bench-category')
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'bench-{i}',
+                category=category,
+                price_per_kg=Decimal('99.90') + i,
+                price_per_100g=Decimal('12.50') if i % 2 else None,
+                old_price_per_kg=Decimal('120') if i % 5 == 0 else None,
+                available_grams='250,500' if i % 2 else '',
+                box_weight=5000 if i % 3 == 0 else None,
+                tag='hit' if i % 7 == 0 else '',
+            )
+            for i in range(size)
+        ], batch_size=1000)
+        ProductImage.objects.bulk_create([
+            ProductImage(product=product, image=f'products/bench-{product.pk}.jpg')
+            for product in products
+        ], batch_size=1000)
+        Product.refresh_cover_images([product.pk for product in products])
+
+    @staticmethod
+    def _measure(repeat, func):
+        """Return the best wall time out of `repeat` runs and the last output."""
+        best = None
+        result = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
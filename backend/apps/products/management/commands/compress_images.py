@@ -1,126 +1,203 @@
 """
-Management command to compress all existing product and category images.
-Run once after deploying image compression feature.
+Management command to compress all existing product, category and chat
+images into shared blobs and generate their responsive sizes.
+
+Work is spread over a process pool. Images that already point at a blob
+are skipped, identical pictures end up in one blob, and progress is
+checkpointed so an interrupted run resumes where it stopped.
+
+    python manage.py compress_images --workers 4
+    python manage.py compress_images --dry-run
 """
+import json
+import multiprocessing
 import os
-from io import BytesIO
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-from PIL import Image as PILImage
-from django.core.files.base import ContentFile
+from django.apps import apps
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.core.management.base import BaseCommand
+from django.db import connections, transaction
 
-from apps.products.models import Category, ProductImage
+from apps.blobs.store import blob_placeholder, blob_sizes, release, store_image
+from apps.products.cache import invalidate_catalog
+from apps.products.snapshots import invalidate_snapshots
+from utils.images import IMAGE_READY, compress_image, file_sha256, schedule_deletion
+from utils.storage import is_blob
 
-MAX_DIMENSION = 1200
-JPEG_QUALITY = 82
+IMAGE_MODELS = ['products.ProductImage', 'products.Category', 'chat.Message']
 
+# Write the checkpoint after this many finished images
+CHECKPOINT_EVERY = 50
 
-def compress_existing_file(image_field):
-    """Compress an existing image file on disk. Returns True if compressed."""
-    if not image_field or not image_field.name:
-        return False
 
+def estimate_compressed_size(image_field) -> int | None:
+    """Size the image would have after compression, or None if it would not shrink."""
+    image_field.open('rb')
     try:
-        image_field.open('rb')
-        img = PILImage.open(image_field)
-    except Exception as e:
-        print(f'  Could not open: {e}')
-        return False
-
-    original_size = image_field.size
-
-    # Convert to RGB
-    if img.mode in ('RGBA', 'P', 'LA'):
-        bg = PILImage.new('RGB', img.size, (255, 255, 255))
-        if img.mode == 'P':
-            img = img.convert('RGBA')
-        bg.paste(img, mask=img.split()[-1] if 'A' in img.mode else None)
-        img = bg
-    elif img.mode != 'RGB':
-        img = img.convert('RGB')
-
-    # Resize if needed
-    w, h = img.size
-    if max(w, h) > MAX_DIMENSION:
-        if w > h:
-            new_w = MAX_DIMENSION
-            new_h = int(h * MAX_DIMENSION / w)
-        else:
-            new_h = MAX_DIMENSION
-            new_w = int(w * MAX_DIMENSION / h)
-        img = img.resize((new_w, new_h), PILImage.LANCZOS)
-
-    # Save to buffer
-    buffer = BytesIO()
-    img.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True)
-    new_size = buffer.tell()
-    buffer.seek(0)
-
-    # Only replace if actually smaller
-    if new_size >= original_size:
+        compressed = compress_image(image_field)
+    finally:
         image_field.close()
-        return False
+    if not isinstance(compressed, InMemoryUploadedFile) or compressed.size >= image_field.size:
+        return None
+    return compressed.size
 
-    # Build new filename (basename only — Django's upload_to adds directory)
-    old_name = image_field.name
-    basename = os.path.basename(old_name)
-    name_without_ext = basename.rsplit('.', 1)[0] if '.' in basename else basename
-    new_name = f'{name_without_ext}.jpg'
 
-    # Delete old file and save new
-    old_path = image_field.path
-    image_field.save(new_name, ContentFile(buffer.read()), save=False)
+def _size_names(sizes) -> list:
+    return [name for size in sizes or [] for name in (size['webp'], size['jpeg'])]
 
-    # Remove old file if different from new
-    if os.path.exists(old_path) and os.path.abspath(old_path) != os.path.abspath(image_field.path):
-        try:
-            os.remove(old_path)
-        except OSError:
-            pass
 
-    return True
+def _process(job):
+    """Optimize one image. Runs in a pool worker process."""
+    label, pk, dry_run = job
+    result = {'key': f'{label}:{pk}', 'status': 'skipped', 'before': 0, 'after': 0}
+    model = apps.get_model(label)
+    obj = model.objects.filter(pk=pk).first()
+    if obj is None or not obj.image:
+        return result
+
+    try:
+        before = obj.image.size
+        # A hash without a blob marks a file optimized before blobs existed
+        optimized = bool(obj.image_hash) and obj.image_hash == file_sha256(obj.image)
+        if optimized and is_blob(obj.image.name):
+            return result
+
+        if dry_run:
+            new_size = None if optimized else estimate_compressed_size(obj.image)
+            result.update(before=before, after=new_size or before)
+            result['status'] = 'compressed' if new_size else 'kept'
+            return result
+
+        stored = store_image(obj.image, compress=not optimized)
+        if stored is None:
+            return dict(result, status='failed', error='could not read image')
+        blob, created = stored
+        old_name = obj.image.name
+        old_sizes = getattr(obj, 'image_sizes', None) or []
+        obj.image.name = blob.name
+
+        fields = {'image': blob.name, 'image_hash': blob.hash, 'image_status': IMAGE_READY}
+        if hasattr(obj, 'image_sizes'):
+            fields['image_sizes'] = blob_sizes(blob, obj.image)
+        if hasattr(obj, 'image_placeholder'):
+            fields['image_placeholder'] = blob_placeholder(blob, obj.image)
+
+        # update() instead of save(): the catalog is invalidated once at the end.
+        # Only a row still holding the image read above is switched over
+        with transaction.atomic():
+            updated = model.objects.filter(
+                pk=pk, image=old_name, image_hash=obj.image_hash,
+            ).update(**fields)
+            if updated == 1:
+                release(obj.image_hash)
+            else:
+                release(blob.hash)
+        if updated != 1:
+            # Replaced or deleted meanwhile: the new image is processed on its own
+            return result
+        # Files of the previous blob are deleted by release() once unused;
+        # files the row owned alone go after a while, as cached pages link them
+        kept = {blob.name, *_size_names(fields.get('image_sizes'))}
+        for name in {old_name, *_size_names(old_sizes)} - kept:
+            if not is_blob(name):
+                schedule_deletion(name)
+        result.update(before=before, after=blob.size if created else 0)
+        result['status'] = 'deduplicated' if not created else 'compressed' if blob.size < before else 'kept'
+    except Exception as e:
+        result.update(status='failed', error=str(e))
+    return result
 
 
 class Command(BaseCommand):
-    help = 'Compress all existing product and category images'
+    help = 'Compress all existing images into shared blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Number of worker processes (default: CPU count)',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only estimate the savings, write nothing',
+        )
+        parser.add_argument(
+            '--checkpoint', default=os.path.join(settings.BASE_DIR, '.compress_images.json'),
+            help='Progress file used to resume an interrupted run',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore an existing checkpoint and start over',
+        )
 
     def handle(self, *args, **options):
-        # Compress product images
-        product_images = ProductImage.objects.all()
-        compressed = 0
-        total = product_images.count()
-        self.stdout.write(f'Processing {total} product images...')
-
-        for pi in product_images:
-            self.stdout.write(f'  [{pi.id}] {pi.image.name}', ending='')
-            if compress_existing_file(pi.image):
-                pi.save(update_fields=['image'])
-                self.stdout.write(' -> compressed')
-                compressed += 1
-            else:
-                self.stdout.write(' -> skipped')
-
-        self.stdout.write(self.style.SUCCESS(
-            f'Product images: {compressed}/{total} compressed'
-        ))
-
-        # Compress category images
-        categories = Category.objects.exclude(image='').exclude(image__isnull=True)
-        compressed = 0
-        total = categories.count()
-        self.stdout.write(f'Processing {total} category images...')
-
-        for cat in categories:
-            self.stdout.write(f'  [{cat.id}] {cat.image.name}', ending='')
-            if compress_existing_file(cat.image):
-                cat.save(update_fields=['image'])
-                self.stdout.write(' -> compressed')
-                compressed += 1
-            else:
-                self.stdout.write(' -> skipped')
-
-        self.stdout.write(self.style.SUCCESS(
-            f'Category images: {compressed}/{total} compressed'
-        ))
-
+        dry_run = options['dry_run']
+        checkpoint = options['checkpoint']
+
+        done = set()
+        if not dry_run and not options['restart'] and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                done = set(json.load(f))
+            self.stdout.write(f'Resuming, {len(done)} images already done')
+
+        jobs = []
+        for label in IMAGE_MODELS:
+            model = apps.get_model(label)
+            pks = model.objects.exclude(image='').exclude(image__isnull=True).values_list('pk', flat=True)
+            jobs += [(label, pk, dry_run) for pk in pks if f'{label}:{pk}' not in done]
+        self.stdout.write(f'Processing {len(jobs)} images with {options["workers"]} workers...')
+
+        # Children must not share the parent's database connection
+        connections.close_all()
+
+        counts = {'compressed': 0, 'kept': 0, 'deduplicated': 0, 'skipped': 0, 'failed': 0}
+        bytes_before = bytes_after = 0
+        started = time.monotonic()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=options['workers'], mp_context=context) as pool:
+            for i, result in enumerate(pool.map(_process, jobs, chunksize=8), start=1):
+                counts[result['status']] += 1
+                if result['status'] in ('compressed', 'kept', 'deduplicated'):
+                    bytes_before += result['before']
+                    bytes_after += result['after']
+                if result['status'] == 'failed':
+                    self.stdout.write(f'  [{result["key"]}] failed: {result["error"]}')
+                else:
+                    done.add(result['key'])
+                if not dry_run and i % CHECKPOINT_EVERY == 0:
+                    self._write_checkpoint(checkpoint, done)
+
+        elapsed = time.monotonic() - started
+        if not dry_run:
+            if os.path.exists(checkpoint):
+                os.remove(checkpoint)
+            if counts['compressed'] or counts['kept'] or counts['deduplicated']:
+                invalidate_catalog()
+                invalidate_snapshots()
+
+        saved = bytes_before - bytes_after
+        verb = 'would save' if dry_run else 'saved'
+        self.stdout.write(
+            f'{counts["compressed"]} compressed, {counts["kept"]} already small, '
+            f'{counts["deduplicated"]} deduplicated, '
+            f'{counts["skipped"]} skipped, {counts["failed"]} failed'
+        )
+        self.stdout.write(
+            f'{verb} {saved / 1024 / 1024:.1f} MB '
+            f'({bytes_before / 1024 / 1024:.1f} MB -> {bytes_after / 1024 / 1024:.1f} MB)'
+        )
+        if elapsed > 0 and jobs:
+            self.stdout.write(
+                f'{len(jobs) / elapsed:.1f} images/s, '
+                f'{bytes_before / 1024 / 1024 / elapsed:.1f} MB/s in {elapsed:.1f}s'
+            )
         self.stdout.write(self.style.SUCCESS('Done!'))
+
+    @staticmethod
+    def _write_checkpoint(path, done):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(sorted(done), f)
+        os.replace(tmp_path, tmp_path[:-len('.tmp')])
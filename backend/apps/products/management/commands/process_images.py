@@ -0,0 +1,68 @@
+"""
+Background worker that compresses uploaded images and builds their
+responsive sizes. Uploads are queued by the models after commit.
+Replaced originals are deleted here too, once their retention has passed.
+
+    python manage.py process_images
+"""
+import logging
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from utils.images import IMAGE_FAILED, IMAGE_PENDING, IMAGE_QUEUE, delete_file, process_image
+from utils.queue import ack, consume, enqueue, move_due, requeue_unfinished
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MODELS = ['products.Category', 'products.ProductImage', 'chat.Message']
+
+
+class Command(BaseCommand):
+    help = 'Process uploaded images in the background'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requeue-pending', action='store_true',
+            help='Queue every image still marked pending (e.g. after losing Redis data)',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when the queue is empty instead of waiting for new jobs',
+        )
+
+    def handle(self, *args, **options):
+        moved = requeue_unfinished(IMAGE_QUEUE)
+        if moved:
+            self.stdout.write(f'Requeued {moved} unfinished jobs')
+
+        if options['requeue_pending']:
+            for label in IMAGE_MODELS:
+                model = apps.get_model(label)
+                for pk in model.objects.filter(image_status=IMAGE_PENDING).values_list('pk', flat=True):
+                    enqueue(IMAGE_QUEUE, {'model': label, 'pk': pk})
+
+        self.stdout.write(self.style.SUCCESS('Image worker is running'))
+        while True:
+            move_due(IMAGE_QUEUE)
+            job = consume(IMAGE_QUEUE)
+            if job is None:
+                if options['once']:
+                    break
+                continue
+
+            raw, payload = job
+            if 'delete' in payload:
+                delete_file(payload['delete'])
+                ack(IMAGE_QUEUE, raw)
+                continue
+            close_old_connections()
+            try:
+                result = process_image(payload['model'], payload['pk'])
+                self.stdout.write(f'  {payload["model"]} #{payload["pk"]} -> {result or "skipped"}')
+            except Exception as e:
+                logger.exception(f'Failed to process {payload}: {e}')
+                model = apps.get_model(payload['model'])
+                model.objects.filter(pk=payload['pk']).update(image_status=IMAGE_FAILED)
+            ack(IMAGE_QUEUE, raw)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_add_missing_product_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at', '-id'], name='products_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:46
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def populate_search_vector(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Product.objects.update(search_vector=(
+        SearchVector('name', weight='A', config='russian')
+        + SearchVector('description', weight='B', config='russian')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_keyset_index'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='products_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='products_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_cover_image(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductImage = apps.get_model('products', 'ProductImage')
+    first_image = ProductImage.objects.filter(
+        product=models.OuterRef('pk'),
+    ).order_by('sort_order', 'id').values('pk')[:1]
+    Product.objects.update(cover_image=models.Subquery(first_image))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.productimage'),
+        ),
+        migrations.RunPython(populate_cover_image, migrations.RunPython.noop),
+    ]
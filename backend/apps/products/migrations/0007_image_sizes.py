@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_cover_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='image_sizes',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='image_sizes',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
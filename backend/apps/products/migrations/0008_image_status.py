@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_image_sizes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='image_status',
+            field=models.CharField(choices=[('pending', 'Обрабатывается'), ('ready', 'Готово'), ('failed', 'Ошибка')], default='ready', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='image_status',
+            field=models.CharField(choices=[('pending', 'Обрабатывается'), ('ready', 'Готово'), ('failed', 'Ошибка')], default='ready', editable=False, max_length=10),
+        ),
+    ]
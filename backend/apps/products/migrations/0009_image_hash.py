@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_image_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='image_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='image_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
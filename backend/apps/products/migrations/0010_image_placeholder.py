@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 16:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_image_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='image_placeholder',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='image_placeholder',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+    ]
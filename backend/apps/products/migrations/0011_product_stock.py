@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-17 16:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_image_placeholder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price_type', models.CharField(choices=[('kg', 'кг'), ('box', 'ящик'), ('pack', 'упаковка'), ('unit', 'штука')], max_length=10)),
+                ('quantity', models.DecimalField(decimal_places=3, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock', to='products.product')),
+            ],
+            options={
+                'db_table': 'product_stock',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='productstock',
+            constraint=models.UniqueConstraint(fields=('product', 'price_type'), name='product_stock_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='productstock',
+            constraint=models.CheckConstraint(check=models.Q(('quantity__gte', 0)), name='product_stock_non_negative'),
+        ),
+    ]
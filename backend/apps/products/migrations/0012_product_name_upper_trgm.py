@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:02
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_product_stock'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='products_name_upper_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 17:31
+
+from django.db import migrations, models
+
+
+def mark_sold_out(apps, schema_editor):
+    # Products the old rule took off sale: tracked, with no row left above zero
+    Product = apps.get_model('products', 'Product')
+    ProductStock = apps.get_model('products', 'ProductStock')
+    rows = ProductStock.objects.filter(product=models.OuterRef('pk'))
+    Product.objects.filter(in_stock=False).filter(
+        models.Exists(rows), ~models.Exists(rows.filter(quantity__gt=0)),
+    ).update(sold_out=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_product_name_upper_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sold_out',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_sold_out, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,30 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from utils.images import compress_image
+from django.db.models.functions import Upper
+
+from apps.blobs.store import release
+from utils.images import (
+    IMAGE_PENDING,
+    IMAGE_READY,
+    IMAGE_STATUS_CHOICES,
+    schedule_image_processing,
+)
 
 
 class Category(models.Model):
     name = models.CharField(max_length=255)
     image = models.ImageField(upload_to='categories/', blank=True, null=True)
+    # Responsive copies: [{'width', 'webp', 'jpeg'}], narrowest first
+    image_sizes = models.JSONField(default=list, blank=True, editable=False)
+    image_status = models.CharField(
+        max_length=10, choices=IMAGE_STATUS_CHOICES,
+        default=IMAGE_READY, editable=False,
+    )
+    # BlurHash shown while the image loads, empty until processed
+    image_placeholder = models.CharField(max_length=100, blank=True, default='', editable=False)
+    # Hash of the shared blob the image points at, empty until processed
+    image_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
     sort_order = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -15,11 +35,18 @@ class Category(models.Model):
         verbose_name_plural = 'categories'
 
     def save(self, *args, **kwargs):
-        if self.image and hasattr(self.image, 'file'):
-            compressed = compress_image(self.image)
-            if compressed:
-                self.image = compressed
+        # New uploads are stored as is and compressed in the background
+        new_upload = bool(self.image) and not self.image._committed
+        if new_upload or not self.image:
+            # Let go of the shared blob the old image pointed at
+            release(self.image_hash)
+            self.image_hash = ''
+            self.image_sizes = []
+            self.image_placeholder = ''
+            self.image_status = IMAGE_PENDING if new_upload else IMAGE_READY
         super().save(*args, **kwargs)
+        if new_upload:
+            schedule_image_processing(self)
 
     def __str__(self):
         return self.name
@@ -95,12 +122,32 @@ class Product(models.Model):
         blank=True, default='',
     )
     in_stock = models.BooleanField(default=True)
+    # in_stock was cleared because the tracked stock ran out, not by an admin
+    sold_out = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # First image by sort order, kept in sync by ProductImage signals
+    cover_image = models.ForeignKey(
+        'ProductImage', on_delete=models.SET_NULL,
+        null=True, blank=True, editable=False,
+        related_name='+',
+    )
+
+    # Weighted name + description tsvector, kept in sync on save
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         db_table = 'products'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination position
+            models.Index(fields=['-created_at', '-id'], name='products_created_id_idx'),
+            GinIndex(fields=['search_vector'], name='products_search_vector_idx'),
+            GinIndex(fields=['name'], name='products_name_trgm_idx', opclasses=['gin_trgm_ops']),
+            # name__icontains compares UPPER(name)
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='products_name_upper_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -118,9 +165,19 @@ class Product(models.Model):
     @property
     def main_image(self):
         """Return first image URL or None."""
-        img = self.images.first()
+        img = self.cover_image
         return img.image.url if img else None
 
+    @classmethod
+    def refresh_cover_images(cls, product_ids):
+        """Point cover_image at the first image of each product in one UPDATE."""
+        first_image = ProductImage.objects.filter(
+            product=models.OuterRef('pk'),
+        ).order_by('sort_order', 'id').values('pk')[:1]
+        cls.objects.filter(pk__in=product_ids).update(
+            cover_image=models.Subquery(first_image),
+        )
+
 
 class ProductImage(models.Model):
     product = models.ForeignKey(
@@ -128,6 +185,16 @@ class ProductImage(models.Model):
         related_name='images',
     )
     image = models.ImageField(upload_to='products/')
+    # Responsive copies: [{'width', 'webp', 'jpeg'}], narrowest first
+    image_sizes = models.JSONField(default=list, blank=True, editable=False)
+    image_status = models.CharField(
+        max_length=10, choices=IMAGE_STATUS_CHOICES,
+        default=IMAGE_READY, editable=False,
+    )
+    # BlurHash shown while the image loads, empty until processed
+    image_placeholder = models.CharField(max_length=100, blank=True, default='', editable=False)
+    # Hash of the shared blob the image points at, empty until processed
+    image_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
     sort_order = models.IntegerField(default=0)
 
     class Meta:
@@ -135,11 +202,50 @@ class ProductImage(models.Model):
         ordering = ['sort_order']
 
     def save(self, *args, **kwargs):
-        if self.image and hasattr(self.image, 'file'):
-            compressed = compress_image(self.image)
-            if compressed:
-                self.image = compressed
+        # New uploads are stored as is and compressed in the background
+        new_upload = bool(self.image) and not self.image._committed
+        if new_upload or not self.image:
+            # Let go of the shared blob the old image pointed at
+            release(self.image_hash)
+            self.image_hash = ''
+            self.image_sizes = []
+            self.image_placeholder = ''
+            self.image_status = IMAGE_PENDING if new_upload else IMAGE_READY
         super().save(*args, **kwargs)
+        if new_upload:
+            schedule_image_processing(self)
 
     def __str__(self):
         return f'Image for {self.product.name}'
+
+
+class ProductStock(models.Model):
+    """
+    Quantity left of a product sold by one price type, in that type's
+    units (kg, boxes, packs, pieces); gram portions draw on the kg stock.
+    Products or price types without a row are not tracked and never run out;
+    a product goes out of stock once every price type it sells is tracked
+    and at zero.
+    Changed by apps.products.stock only.
+    """
+    STOCK_TYPE_CHOICES = [
+        ('kg', 'кг'),
+        ('box', 'ящик'),
+        ('pack', 'упаковка'),
+        ('unit', 'штука'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock')
+    price_type = models.CharField(max_length=10, choices=STOCK_TYPE_CHOICES)
+    quantity = models.DecimalField(max_digits=12, decimal_places=3, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'product_stock'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'price_type'], name='product_stock_unique'),
+            models.CheckConstraint(check=models.Q(quantity__gte=0), name='product_stock_non_negative'),
+        ]
+
+    def __str__(self):
+        return f'{self.product.name}: {self.quantity} {self.get_price_type_display()}'
@@ -0,0 +1,42 @@
+"""
+Product search backend.
+Full-text search over a maintained, weighted tsvector column (Russian
+stemming, so "яблоко" finds "яблоки") combined with pg_trgm similarity on
+the name for typos and partial words, and a substring match on the name
+for prefixes being typed. Each branch has its own GIN index (the
+substring one on UPPER(name), which is what icontains compares), so the
+OR is answered with a bitmap scan instead of a sequential one.
+"""
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db.models import F, Q
+
+SEARCH_CONFIG = 'russian'
+
+PRODUCT_SEARCH_VECTOR = (
+    SearchVector('name', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+)
+
+
+def update_search_vector(product_ids):
+    """Recompute the stored search vector for the given products."""
+    from apps.products.models import Product
+    Product.objects.filter(pk__in=product_ids).update(search_vector=PRODUCT_SEARCH_VECTOR)
+
+
+def search_products(qs, text: str):
+    """Filter a product queryset by a search string, best matches first."""
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    return qs.annotate(
+        rank=SearchRank(F('search_vector'), query) + TrigramSimilarity('name', text),
+    ).filter(
+        Q(search_vector=query)
+        | Q(name__trigram_similar=text)
+        # Substring match keeps prefix typing ("ябл") working
+        | Q(name__icontains=text)
+    ).order_by('-rank', '-id')
@@ -1,25 +1,43 @@
 from rest_framework import serializers
+from apps.products.listing import media_prefix, render_image_sizes
 from apps.products.models import Category, Product, ProductImage
 
 
 class CategorySerializer(serializers.ModelSerializer):
     is_active = serializers.BooleanField(default=True, required=False)
+    image_sizes = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
-        fields = ['id', 'name', 'image', 'sort_order', 'is_active']
+        fields = [
+            'id', 'name', 'image', 'image_sizes', 'image_placeholder', 'image_status',
+            'sort_order', 'is_active',
+        ]
+
+    def get_image_sizes(self, obj):
+        if not obj.image:
+            return []
+        return render_image_sizes(obj.image_sizes, media_prefix(self.context.get('request')))
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    sizes = serializers.SerializerMethodField()
+    placeholder = serializers.CharField(source='image_placeholder', read_only=True)
+
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'sort_order']
+        fields = ['id', 'image', 'sizes', 'placeholder', 'image_status', 'sort_order']
+
+    def get_sizes(self, obj):
+        return render_image_sizes(obj.image_sizes, media_prefix(self.context.get('request')))
 
 
 class ProductListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for product lists."""
     category_name = serializers.CharField(source='category.name', read_only=True)
     main_image = serializers.SerializerMethodField()
+    main_image_sizes = serializers.SerializerMethodField()
+    main_image_placeholder = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -30,11 +48,12 @@ class ProductListSerializer(serializers.ModelSerializer):
             'box_weight', 'pack_weight',
             'old_price_per_kg', 'old_price_per_box', 'old_price_per_pack',
             'old_price_per_unit', 'old_price_per_100g',
-            'tag', 'in_stock', 'main_image',
+            'tag', 'in_stock', 'main_image', 'main_image_sizes', 'main_image_placeholder',
         ]
 
     def get_main_image(self, obj):
-        img = obj.images.first()
+        # Denormalized cover, load with select_related('cover_image')
+        img = obj.cover_image
         if img and img.image:
             request = self.context.get('request')
             if request:
@@ -42,6 +61,18 @@ class ProductListSerializer(serializers.ModelSerializer):
             return img.image.url
         return None
 
+    def get_main_image_sizes(self, obj):
+        img = obj.cover_image
+        if img and img.image:
+            return render_image_sizes(img.image_sizes, media_prefix(self.context.get('request')))
+        return []
+
+    def get_main_image_placeholder(self, obj):
+        img = obj.cover_image
+        if img and img.image:
+            return img.image_placeholder
+        return ''
+
 
 class ProductDetailSerializer(serializers.ModelSerializer):
     """Full product serializer with all images."""
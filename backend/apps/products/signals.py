@@ -0,0 +1,87 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.products.cache import invalidate_catalog
+from apps.products.models import Category, Product, ProductImage, ProductStock
+from apps.products.search import update_search_vector
+from apps.products.stock import sync_in_stock
+from apps.products.snapshots import (
+    ALL_PRODUCTS_SCOPE,
+    CATEGORIES_SCOPE,
+    category_scope,
+    invalidate_snapshots,
+)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def catalog_changed(sender, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {'name', 'description'} & set(update_fields):
+        update_search_vector([instance.pk])
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def product_image_changed(sender, instance, **kwargs):
+    Product.refresh_cover_images([instance.product_id])
+    scopes = {ALL_PRODUCTS_SCOPE}
+    # The product may already be gone when its images are cascade-deleted
+    category_id = Product.objects.filter(
+        pk=instance.product_id,
+    ).values_list('category_id', flat=True).first()
+    if category_id:
+        scopes.add(category_scope(category_id))
+    invalidate_snapshots(scopes)
+
+
+@receiver(pre_save, sender=Product)
+def product_category_before_save(sender, instance, **kwargs):
+    # Remember the old category so a moved product leaves its old snapshot
+    instance._old_category_id = None
+    if instance.pk:
+        old = Product.objects.filter(pk=instance.pk).values_list('category_id', 'in_stock').first()
+        if old:
+            instance._old_category_id = old[0]
+            # Set by hand: stock no longer decides when it comes back
+            if old[1] != instance.in_stock:
+                instance.sold_out = False
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, instance, **kwargs):
+    scopes = {ALL_PRODUCTS_SCOPE, category_scope(instance.category_id)}
+    old_category_id = getattr(instance, '_old_category_id', None)
+    if old_category_id:
+        scopes.add(category_scope(old_category_id))
+    invalidate_snapshots(scopes)
+
+
+@receiver(post_save, sender=Product)
+def product_prices_changed(sender, instance, created=False, **kwargs):
+    # The price types sold decide whether the stock left is enough
+    if not created:
+        sync_in_stock([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    # Product lists embed the category name
+    invalidate_snapshots([CATEGORIES_SCOPE, ALL_PRODUCTS_SCOPE, category_scope(instance.pk)])
+
+
+@receiver(post_save, sender=ProductStock)
+@receiver(post_delete, sender=ProductStock)
+def product_stock_changed(sender, instance, **kwargs):
+    # Stock edited in the admin; reservations sync in_stock themselves
+    sync_in_stock([instance.product_id])
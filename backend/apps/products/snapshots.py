@@ -0,0 +1,126 @@
+"""
+Pre-rendered catalog snapshots.
+The public catalog is rendered into ready-to-send JSON bytes per scope:
+"categories", "products:all" and "products:<category_id>". Public views
+send these bytes as is, so a catalog read costs a couple of Redis GETs.
+
+Each scope has its own generation counter, and one more covers all
+scopes. Writes only bump the generations of the affected scopes once they
+commit, so a write never waits on rendering; a snapshot stored with an
+older generation is never served. The next reader of a stale scope
+re-renders it while the others keep getting the previous body, marked so
+that it is sent without validators and isn't cached by clients.
+
+Snapshots are kept for the origins of the configured hosts only
+(CATALOG_SNAPSHOT_HOSTS), so arbitrary Host headers can't fill Redis.
+"""
+import hashlib
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from utils.cache import bump_version, get_versions
+
+CATEGORIES_SCOPE = 'categories'
+ALL_PRODUCTS_SCOPE = 'products:all'
+# Generation shared by every scope, bumped when all of them change
+ALL_SCOPES_NAMESPACE = 'catalog:snapshot:*'
+# A reader re-rendering a scope holds it for at most this long
+REBUILD_LOCK_TIMEOUT = 30
+
+
+class OriginRequest:
+    """Stand-in for a request when rendering outside of one: only builds URLs."""
+
+    def __init__(self, origin: str):
+        self.origin = origin
+
+    def build_absolute_uri(self, location: str) -> str:
+        return urljoin(self.origin, location)
+
+
+def category_scope(category_id) -> str:
+    return f'products:{category_id}'
+
+
+def _namespace(scope: str) -> str:
+    return f'catalog:snapshot:{scope}'
+
+
+def _snapshot_key(scope: str, origin: str) -> str:
+    digest = hashlib.sha1(origin.encode('utf-8')).hexdigest()
+    return f'{_namespace(scope)}:{digest}'
+
+
+def _render(scope: str, origin: str) -> bytes:
+    from apps.products.listing import render_product_list
+    from apps.products.models import Category, Product
+    from apps.products.serializers import CategorySerializer
+
+    request = OriginRequest(origin)
+    if scope == CATEGORIES_SCOPE:
+        categories = Category.objects.filter(is_active=True)
+        data = CategorySerializer(categories, many=True, context={'request': request}).data
+    else:
+        qs = Product.objects.all()
+        if scope != ALL_PRODUCTS_SCOPE:
+            qs = qs.filter(category_id=scope.split(':', 1)[1])
+        data = render_product_list(qs, request)
+    return JSONRenderer().render(data)
+
+
+def _generation(scope: str) -> tuple:
+    return get_versions(ALL_SCOPES_NAMESPACE, _namespace(scope))
+
+
+def _snapshot_origin(origin: str) -> bool:
+    return urlsplit(origin).hostname in settings.CATALOG_SNAPSHOT_HOSTS
+
+
+def get_snapshot(scope: str, origin: str) -> tuple[bytes, bool]:
+    """
+    Return (rendered JSON, fresh) for a scope, rendering it when stale.
+    fresh is False when the previous generation's body is served because
+    another reader is rendering the new one; such a body must not be
+    cached under the current catalog validators.
+    """
+    if not _snapshot_origin(origin):
+        return _render(scope, origin), True
+
+    key = _snapshot_key(scope, origin)
+    stored = cache.get(key)
+    # Read the generation first: if a write lands while rendering, the
+    # stored snapshot is already outdated and will be ignored
+    generation = _generation(scope)
+    if stored is not None and tuple(stored[0]) == generation:
+        return stored[1], True
+
+    lock_key = f'{key}:rebuild'
+    locked = cache.add(lock_key, 1, timeout=REBUILD_LOCK_TIMEOUT)
+    if not locked and stored is not None:
+        # Another reader is rendering the new one
+        return stored[1], False
+    try:
+        body = _render(scope, origin)
+        cache.set(key, (generation, body), timeout=settings.CATALOG_CACHE_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return body, True
+
+
+def _mark_stale(scopes):
+    if scopes is None:
+        bump_version(ALL_SCOPES_NAMESPACE)
+        return
+    for scope in scopes:
+        bump_version(_namespace(scope))
+
+
+def invalidate_snapshots(scopes=None):
+    """Mark the given scopes (all when None) stale once the transaction commits."""
+    scopes = set(scopes) if scopes is not None else None
+    transaction.on_commit(lambda: _mark_stale(scopes))
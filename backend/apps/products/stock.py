@@ -0,0 +1,165 @@
+"""
+Stock reservations.
+Orders take stock with a conditional UPDATE (quantity >= amount), so
+concurrent orders can never oversell. The rows of an order are locked
+first in one fixed order, which keeps two orders over the same products
+from deadlocking. Whatever the size of the cart this costs two queries,
+plus one to flip in_stock when a product runs out or comes back.
+Locks are held until the caller's transaction commits, so reserve as
+late in it as possible.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db.models import Case, DecimalField, Exists, F, OuterRef, Q, Value, When
+
+from apps.products.cache import invalidate_catalog
+from apps.products.models import Product, ProductStock
+from apps.products.snapshots import ALL_PRODUCTS_SCOPE, category_scope, invalidate_snapshots
+
+# Price fields of the products selling each stock type
+SOLD_BY = {
+    'kg': ('price_per_kg', 'price_per_100g'),
+    'box': ('price_per_box',),
+    'pack': ('price_per_pack',),
+    'unit': ('price_per_unit',),
+}
+
+
+class OutOfStock(Exception):
+    """Not enough of a product is left; carries the product id."""
+
+    def __init__(self, product_id, price_type):
+        super().__init__(f'Not enough stock of product {product_id} ({price_type})')
+        self.product_id = product_id
+        self.price_type = price_type
+
+
+def stock_type(price_type: str) -> str:
+    """ProductStock type an order price type draws on."""
+    return 'kg' if price_type == 'gram' else price_type
+
+
+def stock_amount(price_type: str, quantity: Decimal, selected_grams=None) -> tuple[str, Decimal]:
+    """Stock type and amount taken by one cart line."""
+    if price_type == 'gram':
+        grams = Decimal(str(selected_grams or 0))
+        return stock_type(price_type), quantity * grams / Decimal('1000')
+    return price_type, quantity
+
+
+def _rows(needs):
+    keys = sorted(needs)
+    return ProductStock.objects.filter(reduce(or_, (
+        Q(product_id=product_id, price_type=price_type) for product_id, price_type in keys
+    )))
+
+
+def _apply(rows, sign: int):
+    """Add (sign=1) or take (sign=-1) amounts from locked rows in one UPDATE."""
+    delta = Case(
+        *[When(pk=pk, then=Value(amount)) for pk, amount in rows.items()],
+        output_field=DecimalField(max_digits=12, decimal_places=3),
+    )
+    qs = ProductStock.objects.filter(pk__in=rows)
+    if sign < 0:
+        # Can't go below zero even if a caller skipped the lock
+        qs = qs.filter(quantity__gte=delta)
+        return qs.update(quantity=F('quantity') - delta)
+    return qs.update(quantity=F('quantity') + delta)
+
+
+def _available() -> Q:
+    """Products selling at least one price type that is untracked or has stock left."""
+    available = Q()
+    for price_type, fields in SOLD_BY.items():
+        sells = reduce(or_, (Q(**{f'{field}__isnull': False}) for field in fields))
+        rows = ProductStock.objects.filter(product=OuterRef('pk'), price_type=price_type)
+        available |= sells & (Exists(rows.filter(quantity__gt=0)) | ~Exists(rows))
+    return available
+
+
+def sync_in_stock(product_ids):
+    """
+    Take products whose sold price types all ran out off sale, and put
+    back on sale those that stock took off once any of them has stock again.
+    Products an admin took off sale are left alone.
+    """
+    tracked = Exists(ProductStock.objects.filter(product=OuterRef('pk')))
+    sold_out = Product.objects.filter(tracked, id__in=product_ids, in_stock=True).exclude(_available())
+    back = Product.objects.filter(id__in=product_ids, in_stock=False, sold_out=True).filter(_available())
+    changed = (
+        sold_out.update(in_stock=False, sold_out=True)
+        + back.update(in_stock=True, sold_out=False)
+    )
+    if changed:
+        # update() bypasses model signals
+        categories = Product.objects.filter(id__in=product_ids).values_list('category_id', flat=True)
+        invalidate_catalog()
+        invalidate_snapshots({ALL_PRODUCTS_SCOPE, *(category_scope(pk) for pk in set(categories))})
+
+
+def reserve(needs: dict) -> dict:
+    """
+    Take stock for {(product_id, price_type): amount}, inside the caller's
+    transaction. Returns the part of `needs` that is tracked, which is
+    what release() has to give back. Raises OutOfStock, leaving the
+    transaction to roll back.
+    """
+    needs = {key: amount for key, amount in needs.items() if amount > 0}
+    if not needs:
+        return {}
+
+    locked = list(
+        _rows(needs).select_for_update()
+        .order_by('product_id', 'price_type')
+        .values_list('pk', 'product_id', 'price_type', 'quantity')
+    )
+    rows, reserved, emptied = {}, {}, []
+    for pk, product_id, price_type, quantity in locked:
+        amount = needs[(product_id, price_type)]
+        if quantity < amount:
+            raise OutOfStock(product_id, price_type)
+        rows[pk] = amount
+        reserved[(product_id, price_type)] = amount
+        if quantity == amount:
+            emptied.append(product_id)
+
+    if rows and _apply(rows, -1) != len(rows):
+        # Only possible if the rows were changed without locking them
+        raise OutOfStock(*locked[0][1:3])
+    if emptied:
+        sync_in_stock(emptied)
+    return reserved
+
+
+def release(reserved: dict):
+    """Give back stock taken by reserve(), e.g. when an order is cancelled."""
+    reserved = {key: amount for key, amount in reserved.items() if amount > 0}
+    if not reserved:
+        return
+
+    locked = list(
+        _rows(reserved).select_for_update()
+        .order_by('product_id', 'price_type')
+        .values_list('pk', 'product_id', 'price_type', 'quantity')
+    )
+    rows, restocked = {}, []
+    for pk, product_id, price_type, quantity in locked:
+        rows[pk] = reserved[(product_id, price_type)]
+        if quantity == 0:
+            restocked.append(product_id)
+    if rows:
+        _apply(rows, 1)
+    if restocked:
+        sync_in_stock(restocked)
+
+
+def total_needs(lines) -> dict:
+    """Sum (product_id, price_type, amount) triples per stock row."""
+    needs = defaultdict(Decimal)
+    for product_id, price_type, amount in lines:
+        needs[(product_id, price_type)] += amount
+    return dict(needs)
@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.products.models import Category, Product
+
+
+class ConditionalCatalogTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Фрукты')
+        self.product = Product.objects.create(name='Яблоки', category=self.category, price_per_kg=Decimal('100'))
+
+    def test_unchanged_catalog_answers_304(self):
+        first = self.client.get('/api/products/')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('public', first['Cache-Control'])
+        self.assertIn('max-age=0', first['Cache-Control'])
+
+        for path in ('/api/products/', f'/api/products/{self.product.pk}/', '/api/categories/'):
+            with self.subTest(path=path):
+                again = self.client.get(path, HTTP_IF_NONE_MATCH=first['ETag'])
+                self.assertEqual(again.status_code, 304)
+                self.assertEqual(again.content, b'')
+                self.assertEqual(again['ETag'], first['ETag'])
+
+    def test_write_changes_etag_and_body(self):
+        first = self.client.get('/api/products/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Груши'
+            self.product.save()
+
+        second = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertIn('Груши', second.content.decode())
+        self.assertNotIn('Яблоки', second.content.decode())
+
+    def test_version_is_only_bumped_after_commit(self):
+        first = self.client.get('/api/products/')
+
+        with self.captureOnCommitCallbacks(execute=False):
+            self.product.name = 'Груши'
+            self.product.save()
+            # Not committed yet: readers must not cache the old body under a new tag
+            during = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(during.status_code, 304)
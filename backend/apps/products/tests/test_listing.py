@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.products.listing import render_product_list
+from apps.products.models import Category, Product, ProductImage
+from apps.products.snapshots import OriginRequest
+
+REQUEST = OriginRequest('http://testserver/')
+
+
+class CoverImageTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Фрукты')
+
+    def _product(self, name, images=()):
+        product = Product.objects.create(name=name, category=self.category, price_per_kg=Decimal('100'))
+        for sort_order, image in images:
+            ProductImage.objects.create(product=product, image=image, sort_order=sort_order)
+        return product
+
+    def test_listing_query_count_does_not_depend_on_size(self):
+        self._product('Яблоки', [(1, 'products/a2.jpg'), (0, 'products/a1.jpg')])
+        with CaptureQueriesContext(connection) as single:
+            render_product_list(Product.objects.all(), REQUEST)
+
+        for i in range(20):
+            self._product(f'Груши {i}', [(0, f'products/p{i}.jpg'), (1, f'products/q{i}.jpg')])
+        with self.assertNumQueries(len(single)):
+            rows = render_product_list(Product.objects.all(), REQUEST)
+
+        self.assertEqual(len(single), 1)
+        self.assertEqual(len(rows), 21)
+        main_images = {row['name']: row['main_image'] for row in rows}
+        self.assertEqual(main_images['Яблоки'], 'http://testserver/media/products/a1.jpg')
+
+    def test_cover_follows_image_changes(self):
+        product = self._product('Яблоки', [(1, 'products/a2.jpg')])
+        first = ProductImage.objects.create(product=product, image='products/a1.jpg', sort_order=0)
+        product.refresh_from_db()
+        self.assertEqual(product.cover_image_id, first.pk)
+
+        first.sort_order = 5
+        first.save()
+        product.refresh_from_db()
+        self.assertEqual(product.cover_image.image.name, 'products/a2.jpg')
+
+        ProductImage.objects.exclude(pk=first.pk).get(product=product).delete()
+        product.refresh_from_db()
+        self.assertEqual(product.cover_image_id, first.pk)
+
+        first.delete()
+        product.refresh_from_db()
+        self.assertIsNone(product.cover_image)
@@ -0,0 +1,60 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.products.models import Category, Product
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Фрукты')
+        now = timezone.now()
+        for i in range(7):
+            product = self._product(f'Товар {i}')
+            # Products 2-5 share a timestamp, so pages split inside a tie
+            created_at = now - timedelta(minutes=3) if 2 <= i <= 5 else now - timedelta(minutes=10 - i)
+            Product.objects.filter(pk=product.pk).update(created_at=created_at)
+
+    def _product(self, name):
+        return Product.objects.create(name=name, category=self.category, price_per_kg=Decimal('100'))
+
+    def _page(self, cursor=None):
+        params = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+        response = self.client.get('/api/products/', params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [row['id'] for row in data['results']], data['next']
+
+    def _expected(self):
+        return list(Product.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def test_pages_cover_every_product_once_across_ties(self):
+        expected = self._expected()
+        seen, cursor = [], None
+        while True:
+            ids, cursor = self._page(cursor)
+            seen += ids
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, expected)
+
+    def test_inserts_while_paging_do_not_shift_later_pages(self):
+        expected = self._expected()
+        first, cursor = self._page()
+
+        # Newer than anything paged so far: belongs before page one
+        self._product('Новый товар')
+        second, cursor = self._page(cursor)
+        third, cursor = self._page(cursor)
+
+        self.assertEqual(first + second + third, expected)
+        self.assertIsNone(cursor)
+
+    def test_invalid_cursor_is_rejected(self):
+        for cursor in ('garbage', 'bm90LWEtZGF0ZXwx'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/products/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,34 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.products.models import Category, Product
+from apps.products.search import search_products
+
+
+class SearchPaginationTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Фрукты')
+        names = ['Яблоки', 'Яблоки красные', 'Яблоки зелёные', 'Яблочный сок', 'Груши']
+        for name in names:
+            Product.objects.create(name=name, category=category, price_per_kg=Decimal('100'))
+
+    def test_pages_cover_all_matches_once(self):
+        expected = list(search_products(Product.objects.all(), 'ябл').values_list('id', flat=True))
+        seen, cursor = [], None
+        while True:
+            params = {'search': 'ябл', 'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get('/api/products/', params).json()
+            seen += [row['id'] for row in data['results']]
+            cursor = data['next']
+            if not cursor:
+                break
+
+        self.assertEqual(len(expected), 4)
+        self.assertEqual(seen, expected)
+
+    def test_rejects_an_invalid_cursor(self):
+        response = self.client.get('/api/products/', {'search': 'ябл', 'cursor': 'bm90LWEtcmFuaw'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,39 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.products.models import Category, Product
+from apps.products.snapshots import CATEGORIES_SCOPE, _snapshot_key
+
+
+@override_settings(CATALOG_SNAPSHOT_HOSTS=['testserver'])
+class StaleSnapshotTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Фрукты')
+        Product.objects.create(name='Яблоки', category=self.category, price_per_kg=Decimal('100'))
+
+    def test_busy_rebuild_serves_old_body_without_validators(self):
+        first = self.client.get('/api/categories/')
+        self.assertIn('ETag', first)
+        old_body = first.content
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Овощи'
+            self.category.save()
+        # Another reader is rebuilding the snapshot
+        lock_key = f'{_snapshot_key(CATEGORIES_SCOPE, "http://testserver/")}:rebuild'
+        cache.add(lock_key, 1, timeout=30)
+
+        stale = self.client.get('/api/categories/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(stale.content, old_body)
+        self.assertNotIn('ETag', stale)
+        self.assertNotIn('Last-Modified', stale)
+        self.assertIn('no-cache', stale['Cache-Control'])
+
+        cache.delete(lock_key)
+        fresh = self.client.get('/api/categories/')
+        self.assertIn('Овощи', fresh.content.decode())
+        self.assertIn('ETag', fresh)
+        self.assertNotEqual(fresh['ETag'], first['ETag'])
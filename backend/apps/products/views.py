@@ -1,56 +1,113 @@
+from django.db import transaction
+from django.http import HttpResponse
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from apps.products.cache import (
+    CATALOG_NAMESPACE,
+    catalog_params,
+    get_cached_catalog,
+    invalidate_catalog,
+)
+from apps.products.listing import (
+    media_prefix,
+    project_products,
+    render_product_list,
+    render_product_rows,
+)
 from apps.products.models import Category, Product, ProductImage
+from apps.products.search import search_products
+from apps.products.snapshots import (
+    ALL_PRODUCTS_SCOPE,
+    CATEGORIES_SCOPE,
+    category_scope,
+    get_snapshot,
+    invalidate_snapshots,
+)
 from apps.products.serializers import (
     CategorySerializer,
-    ProductListSerializer,
     ProductDetailSerializer,
     ProductCreateUpdateSerializer,
     ProductImageSerializer,
 )
+from utils.http import conditional_get
+from utils.pagination import KeysetPaginator, RankedKeysetPaginator
 
 
 # ─── Public endpoints ──────────────────────────────────────
 
+def _snapshot_response(scope, params):
+    body, fresh = get_snapshot(scope, params['origin'])
+    response = HttpResponse(body, content_type='application/json')
+    # Tells conditional_get not to attach the current version's validators
+    response.is_stale = not fresh
+    return response
+
+
+@conditional_get(CATALOG_NAMESPACE)
 @api_view(['GET'])
 def category_list(request):
     """List all active categories."""
-    categories = Category.objects.filter(is_active=True)
-    serializer = CategorySerializer(categories, many=True, context={'request': request})
-    return Response(serializer.data)
+    return _snapshot_response(CATEGORIES_SCOPE, catalog_params(request))
 
 
+@conditional_get(CATALOG_NAMESPACE)
 @api_view(['GET'])
 def product_list(request):
-    """List products with optional filters."""
-    qs = Product.objects.select_related('category').prefetch_related('images')
-
-    # Filter by category
-    category_id = request.query_params.get('category')
-    if category_id:
-        qs = qs.filter(category_id=category_id)
-
-    # Filter by tag
-    tag = request.query_params.get('tag')
-    if tag:
-        qs = qs.filter(tag=tag)
-
-    # Filter in_stock only
-    in_stock = request.query_params.get('in_stock')
-    if in_stock == '1':
-        qs = qs.filter(in_stock=True)
-
-    # Search by name
-    search = request.query_params.get('search')
-    if search:
-        qs = qs.filter(name__icontains=search)
-
-    serializer = ProductListSerializer(qs, many=True, context={'request': request})
-    return Response(serializer.data)
-
-
+    """List products with optional filters.
+
+    Pass ?limit= and/or ?cursor= to get a keyset-paginated page
+    ({"results": [...], "next": cursor}) instead of the full list.
+    """
+    params = catalog_params(
+        request, 'category', 'tag', 'in_stock', 'search', 'cursor', 'limit',
+    )
+    paginate = KeysetPaginator.is_requested(request)
+
+    # Plain and per-category listings are served from pre-rendered snapshots
+    if not (paginate or params['tag'] or params['in_stock'] or params['search']):
+        if not params['category']:
+            return _snapshot_response(ALL_PRODUCTS_SCOPE, params)
+        if params['category'].isdigit():
+            return _snapshot_response(category_scope(params['category']), params)
+
+    def build():
+        qs = Product.objects.all()
+
+        # Filter by category
+        if params['category']:
+            qs = qs.filter(category_id=params['category'])
+
+        # Filter by tag
+        if params['tag']:
+            qs = qs.filter(tag=params['tag'])
+
+        # Filter in_stock only
+        if params['in_stock']:
+            qs = qs.filter(in_stock=True)
+
+        # Full-text + trigram search, ranked
+        if params['search']:
+            qs = search_products(qs, params['search'])
+            if paginate:
+                # Best matches first, paged by (rank, id)
+                paginator = RankedKeysetPaginator(request)
+                rows = paginator.paginate_queryset(project_products(qs, 'rank'))
+                return paginator.get_paginated_data(render_product_rows(rows, media_prefix(request)))
+
+        if paginate:
+            paginator = KeysetPaginator(request)
+            rows = paginator.paginate_queryset(project_products(qs))
+            return paginator.get_paginated_data(render_product_rows(rows, media_prefix(request)))
+
+        return render_product_list(qs, request)
+
+    data = get_cached_catalog('products', params, build)
+    return Response(data)
+
+
+@conditional_get(CATALOG_NAMESPACE)
 @api_view(['GET'])
 def product_detail(request, pk):
     """Get single product with all images."""
@@ -110,18 +167,24 @@ def admin_product_list_create(request):
         return Response({'error': 'Forbidden'}, status=403)
 
     if request.method == 'GET':
-        products = Product.objects.select_related('category').prefetch_related('images').all()
-        serializer = ProductListSerializer(products, many=True, context={'request': request})
-        return Response(serializer.data)
+        products = Product.objects.all()
+        if KeysetPaginator.is_requested(request):
+            paginator = KeysetPaginator(request)
+            rows = paginator.paginate_queryset(project_products(products))
+            data = render_product_rows(rows, media_prefix(request))
+            return Response(paginator.get_paginated_data(data))
+        return Response(render_product_list(products, request))
 
     serializer = ProductCreateUpdateSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    product = serializer.save()
+    # One transaction so catalog snapshots go stale after all images are saved
+    with transaction.atomic():
+        product = serializer.save()
 
-    # Handle uploaded images
-    images = request.FILES.getlist('images')
-    for i, img in enumerate(images):
-        ProductImage.objects.create(product=product, image=img, sort_order=i)
+        # Handle uploaded images
+        images = request.FILES.getlist('images')
+        for i, img in enumerate(images):
+            ProductImage.objects.create(product=product, image=img, sort_order=i)
 
     return Response(ProductDetailSerializer(product, context={'request': request}).data, status=201)
 
@@ -147,16 +210,17 @@ def admin_product_detail(request, pk):
 
     serializer = ProductCreateUpdateSerializer(product, data=request.data, partial=True)
     serializer.is_valid(raise_exception=True)
-    product = serializer.save()
-
-    # Handle new uploaded images
-    images = request.FILES.getlist('images')
-    if images:
-        for i, img in enumerate(images):
-            ProductImage.objects.create(
-                product=product, image=img,
-                sort_order=product.images.count() + i,
-            )
+    with transaction.atomic():
+        product = serializer.save()
+
+        # Handle new uploaded images
+        images = request.FILES.getlist('images')
+        if images:
+            for i, img in enumerate(images):
+                ProductImage.objects.create(
+                    product=product, image=img,
+                    sort_order=product.images.count() + i,
+                )
 
     return Response(ProductDetailSerializer(product, context={'request': request}).data)
 
@@ -199,6 +263,9 @@ def admin_category_bulk(request):
     else:
         return Response({'error': 'Invalid action'}, status=400)
 
+    # update() bypasses model signals
+    invalidate_catalog()
+    invalidate_snapshots()
     return Response({'ok': True})
 
 
@@ -219,9 +286,9 @@ def admin_product_bulk(request):
     if action == 'delete':
         qs.delete()
     elif action == 'out_of_stock':
-        qs.update(in_stock=False)
+        qs.update(in_stock=False, sold_out=False)
     elif action == 'in_stock':
-        qs.update(in_stock=True)
+        qs.update(in_stock=True, sold_out=False)
     elif action == 'move':
         category_id = request.data.get('category_id')
         if not category_id:
@@ -234,4 +301,7 @@ def admin_product_bulk(request):
     else:
         return Response({'error': 'Invalid action'}, status=400)
 
+    # update() bypasses model signals
+    invalidate_catalog()
+    invalidate_snapshots()
     return Response({'ok': True})
@@ -5,3 +5,6 @@ class SettingsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.settings_app'
     verbose_name = 'Shop Settings'
+
+    def ready(self):
+        from apps.settings_app import signals  # noqa: F401
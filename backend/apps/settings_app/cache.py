@@ -0,0 +1,39 @@
+"""
+Shop settings cache version.
+Bumped whenever any shop setting, payment or delivery option changes.
+Pricing reads its settings through the same version, so they are never
+queried per order.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from apps.settings_app.models import DeliveryMethod, ShopSettings
+from utils.cache import bump_version, get_or_build
+
+SETTINGS_NAMESPACE = 'shop_settings'
+
+
+def invalidate_settings():
+    """Bump the settings version once the current transaction commits."""
+    transaction.on_commit(lambda: bump_version(SETTINGS_NAMESPACE))
+
+
+def get_pricing_settings() -> dict:
+    """
+    Shop settings and active delivery prices used to price orders,
+    cached until any setting changes.
+    """
+    def build():
+        shop_settings = ShopSettings.load()
+        delivery_prices = {}
+        for name, price in DeliveryMethod.objects.filter(is_active=True).values_list('name', 'price'):
+            # Same as .filter(name=...).first(): the first by sort order wins
+            delivery_prices.setdefault(name, price)
+        return {
+            'min_order_sum': shop_settings.min_order_sum,
+            'free_delivery_threshold': shop_settings.free_delivery_threshold,
+            'urgency_surcharge': shop_settings.urgency_surcharge,
+            'delivery_prices': delivery_prices,
+        }
+
+    return get_or_build(SETTINGS_NAMESPACE, 'pricing', {}, build, timeout=settings.SETTINGS_CACHE_TIMEOUT)
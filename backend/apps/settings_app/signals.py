@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.settings_app.cache import invalidate_settings
+from apps.settings_app.models import (
+    ShopSettings,
+    PaymentMethod,
+    DeliveryMethod,
+    DeliveryDistrict,
+    DeliveryInterval,
+)
+
+
+@receiver(post_save, sender=ShopSettings)
+@receiver(post_delete, sender=ShopSettings)
+@receiver(post_save, sender=PaymentMethod)
+@receiver(post_delete, sender=PaymentMethod)
+@receiver(post_save, sender=DeliveryMethod)
+@receiver(post_delete, sender=DeliveryMethod)
+@receiver(post_save, sender=DeliveryDistrict)
+@receiver(post_delete, sender=DeliveryDistrict)
+@receiver(post_save, sender=DeliveryInterval)
+@receiver(post_delete, sender=DeliveryInterval)
+def settings_changed(sender, **kwargs):
+    invalidate_settings()
@@ -0,0 +1,22 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.settings_app.models import ShopSettings
+
+
+class ConditionalSettingsTests(TestCase):
+    def test_settings_change_invalidates_etag(self):
+        first = self.client.get('/api/settings/')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get('/api/settings/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            shop = ShopSettings.load()
+            shop.min_order_sum = Decimal('1500')
+            shop.save()
+
+        second = self.client.get('/api/settings/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.json()['min_order_sum'], '1500.00')
@@ -1,6 +1,7 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from apps.settings_app.cache import SETTINGS_NAMESPACE
 from apps.settings_app.models import (
     ShopSettings,
     PaymentMethod,
@@ -15,8 +16,10 @@ from apps.settings_app.serializers import (
     DeliveryDistrictSerializer,
     DeliveryIntervalSerializer,
 )
+from utils.http import conditional_get
 
 
+@conditional_get(SETTINGS_NAMESPACE)
 @api_view(['GET'])
 def public_settings(request):
     """Public: get all shop settings for the client."""
@@ -18,11 +18,13 @@ INSTALLED_APPS = [
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Third party
     'rest_framework',
     'corsheaders',
     # Local apps
     'apps.users',
+    'apps.blobs',
     'apps.products',
     'apps.orders',
     'apps.chat',
@@ -83,6 +85,18 @@ CACHES = {
     }
 }
 
+# Public catalog responses are invalidated by version bumps, the timeout
+# only bounds memory for entries that are never read again
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '3600'))
+# Same for the shop settings used to price orders
+SETTINGS_CACHE_TIMEOUT = int(os.getenv('SETTINGS_CACHE_TIMEOUT', '3600'))
+# Hosts whose catalog snapshots are kept; requests for other hosts are
+# rendered without being stored
+CATALOG_SNAPSHOT_HOSTS = [
+    host.strip() for host in os.getenv('CATALOG_SNAPSHOT_HOSTS', ','.join(ALLOWED_HOSTS)).split(',')
+    if host.strip() and '*' not in host and not host.strip().startswith('.')
+]
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = 'ru'
@@ -98,6 +112,12 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are named by content hash so media URLs can be cached forever
+STORAGES = {
+    'default': {'BACKEND': 'utils.storage.HashedFileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # CORS
@@ -0,0 +1,82 @@
+"""
+BlurHash encoder (https://blurha.sh).
+Turns an image into a ~30 character string that clients decode into a
+blurred placeholder while the real image loads.
+"""
+import math
+
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+def _encode83(value: int, length: int) -> str:
+    return ''.join(
+        BASE83[(value // 83 ** (length - i)) % 83]
+        for i in range(1, length + 1)
+    )
+
+
+def _srgb_to_linear(value: int) -> float:
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value: float) -> int:
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value: float, exp: float) -> float:
+    return math.copysign(abs(value) ** exp, value)
+
+
+def encode(img, x_components: int = 4, y_components: int = 3) -> str:
+    """
+    Encode a small RGB PIL image. Keep it around 32px: the cost grows with
+    pixels x components.
+    """
+    width, height = img.size
+    pixels = [tuple(_srgb_to_linear(c) for c in px) for px in img.getdata()]
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            norm = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                basis_y = norm * cos_y[j][y]
+                for x in range(width):
+                    basis = basis_y * cos_x[i][x]
+                    pr, pg, pb = pixels[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = 1 / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(v) for factor in ac for v in factor)
+        quantised_max = max(0, min(82, math.floor(actual_max * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += _encode83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _encode83(0, 1)
+
+    result += _encode83(
+        (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4,
+    )
+    for factor in ac:
+        quantised = [
+            max(0, min(18, math.floor(_sign_pow(v / max_value, 0.5) * 9 + 9.5)))
+            for v in factor
+        ]
+        result += _encode83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2)
+    return result
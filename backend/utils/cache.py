@@ -0,0 +1,79 @@
+"""
+Versioned cache helpers.
+Each namespace owns a version counter in Redis. Cached entries embed the
+current version in their key, so bumping the counter invalidates every
+entry of the namespace at once without scanning or deleting keys.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+
+def _version_key(namespace: str) -> str:
+    return f'{namespace}:version'
+
+
+def _modified_key(namespace: str) -> str:
+    return f'{namespace}:modified'
+
+
+def _seed_version(namespace: str) -> None:
+    # Seed from the clock so a lost counter never reuses an old version
+    cache.add(_version_key(namespace), int(time.time() * 1000), timeout=None)
+
+
+def get_version(namespace: str) -> int:
+    """Return the current version of a namespace, creating it if missing."""
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        _seed_version(namespace)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def get_versions(*namespaces) -> tuple:
+    """Return the current versions of several namespaces in one round trip."""
+    found = cache.get_many([_version_key(namespace) for namespace in namespaces])
+    return tuple(
+        found.get(_version_key(namespace)) or get_version(namespace)
+        for namespace in namespaces
+    )
+
+
+def bump_version(namespace: str) -> int:
+    """Invalidate all cached entries of a namespace. Returns the new version."""
+    cache.set(_modified_key(namespace), int(time.time()), timeout=None)
+    try:
+        return cache.incr(_version_key(namespace))
+    except ValueError:
+        _seed_version(namespace)
+        return cache.incr(_version_key(namespace))
+
+
+def get_last_modified(namespace: str) -> datetime | None:
+    """Return when the namespace version was last bumped, if known."""
+    timestamp = cache.get(_modified_key(namespace))
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def make_key(namespace: str, name: str, params: dict, version: int | None = None) -> str:
+    """Build a cache key from the namespace version and normalized params."""
+    if version is None:
+        version = get_version(namespace)
+    raw = '&'.join(f'{k}={params[k]}' for k in sorted(params))
+    digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    return f'{namespace}:{version}:{name}:{digest}'
+
+
+def get_or_build(namespace: str, name: str, params: dict, builder, timeout: int):
+    """Read-through cache: return the cached value or build and store it."""
+    key = make_key(namespace, name, params)
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, timeout=timeout)
+    return value
@@ -0,0 +1,54 @@
+"""
+HTTP caching helpers.
+Lets clients revalidate public responses with ETag / Last-Modified derived
+from a versioned cache namespace, so an unchanged resource costs a Redis
+lookup and an empty 304 instead of queries and serialization.
+"""
+from functools import wraps
+
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from utils.cache import get_last_modified, get_version
+
+# Clients may show a cached body this long while refetching in background
+STALE_WHILE_REVALIDATE = 60
+
+
+def conditional_get(namespace: str, stale_while_revalidate: int = STALE_WHILE_REVALIDATE):
+    """
+    Answer conditional GETs for a view whose output only changes when the
+    namespace version is bumped. Must wrap the view outside @api_view so a
+    304 is returned before DRF runs.
+    A view that had to answer with an outdated body sets
+    `response.is_stale`; it is then sent without ETag / Last-Modified and
+    with no-cache, so clients never store it under the new version.
+    """
+    def etag(request, *args, **kwargs):
+        return f'{namespace}-{get_version(namespace)}'
+
+    def last_modified(request, *args, **kwargs):
+        return get_last_modified(namespace)
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if getattr(response, 'is_stale', False):
+                response.headers.pop('ETag')
+                response.headers.pop('Last-Modified')
+                patch_cache_control(response, no_cache=True)
+            elif response.status_code in (200, 304):
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=0,
+                    stale_while_revalidate=stale_while_revalidate,
+                )
+            return response
+
+        return wrapped
+
+    return decorator
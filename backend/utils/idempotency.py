@@ -0,0 +1,96 @@
+"""
+Idempotency keys for unsafe requests.
+A client sends the same Idempotency-Key header with every retry of one
+request. The first request to claim the key runs; its reply is stored in
+Redis and replayed to later retries. A retry arriving while the first is
+still running waits for that reply instead of running the request again.
+Views keep their own durable record (e.g. a unique column and the
+request fingerprint) as a fallback for when Redis has lost the reply.
+Claims are plain Redis keys holding the owner's token, so release() can
+compare and delete them atomically.
+"""
+import hashlib
+import json
+import time
+import uuid
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 64
+
+# How long replies are kept for retries
+REPLY_TIMEOUT = 24 * 60 * 60
+# A claim expires if its request dies without releasing it
+LOCK_TIMEOUT = 30
+# How long a duplicate waits for the first request before giving up
+WAIT_TIMEOUT = 10
+
+# Deletes the lock only if it still holds our token, in one step
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class IdempotencyConflict(Exception):
+    """The key is held by a request that didn't finish in time."""
+
+
+def _reply_key(scope: str, key: str) -> str:
+    return f'idempotency:{scope}:{key}'
+
+
+def _lock_key(scope: str, key: str) -> str:
+    return f'idempotency:{scope}:{key}:lock'
+
+
+def fingerprint(data) -> str:
+    """Hash of a request body, to tell a retry from a reuse of the key."""
+    raw = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def claim(scope: str, key: str, wait: float = WAIT_TIMEOUT) -> tuple[str | None, dict | None]:
+    """
+    Wait until either this request owns the key or an earlier request has
+    stored its reply. Returns (token, None) once owned; pass the token to
+    release(). Returns (None, reply) when there is a reply to replay.
+    Raises IdempotencyConflict after `wait` seconds.
+    """
+    deadline = time.monotonic() + wait
+    delay = 0.05
+    token = uuid.uuid4().hex
+    while True:
+        reply = cache.get(_reply_key(scope, key))
+        if reply is not None:
+            return None, reply
+        if get_redis_connection('default').set(_lock_key(scope, key), token, nx=True, ex=LOCK_TIMEOUT):
+            # The owner may have stored its reply and left since our read
+            reply = cache.get(_reply_key(scope, key))
+            if reply is not None:
+                release(scope, key, token)
+                return None, reply
+            return token, None
+        if time.monotonic() >= deadline:
+            raise IdempotencyConflict(key)
+        time.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+
+def store(scope: str, key: str, request_fingerprint: str, status: int, data):
+    """Save the reply of a finished request for its retries."""
+    cache.set(
+        _reply_key(scope, key),
+        {'fingerprint': request_fingerprint, 'status': status, 'data': data},
+        timeout=REPLY_TIMEOUT,
+    )
+
+
+def release(scope: str, key: str, token: str):
+    """Give up a claim, unless it already expired and was taken by another request."""
+    redis = get_redis_connection('default')
+    redis.register_script(RELEASE_SCRIPT)(keys=[_lock_key(scope, key)], args=[token])
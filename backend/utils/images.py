@@ -1,55 +1,158 @@
 """
 Image compression utility.
 Resizes and compresses uploaded images to reduce file size for mobile clients.
+Uploads are stored as is and processed by the `process_images` worker,
+which moves them into shared content-addressed blobs (apps.blobs).
 """
+import hashlib
 import io
-from PIL import Image
+import logging
+import os
+from PIL import Image, ImageOps
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import transaction
+
+from utils import blurhash
+from utils.queue import enqueue, enqueue_later
+
+logger = logging.getLogger(__name__)
+
+IMAGE_QUEUE = 'images'
+
+IMAGE_PENDING = 'pending'
+IMAGE_READY = 'ready'
+IMAGE_FAILED = 'failed'
+IMAGE_STATUS_CHOICES = [
+    (IMAGE_PENDING, 'Обрабатывается'),
+    (IMAGE_READY, 'Готово'),
+    (IMAGE_FAILED, 'Ошибка'),
+]
 
 
 MAX_DIMENSION = 1200  # max width or height in pixels
 JPEG_QUALITY = 82     # JPEG quality (1-100)
+WEBP_QUALITY = 80     # WebP quality (1-100)
+STRIP_METADATA = True  # drop EXIF (camera, GPS) from compressed images
+
+# Larger images are refused before decoding (~100MP, above any phone camera)
+MAX_PIXELS = 100_000_000
+
+# Widths of the responsive copies generated for each image
+DERIVATIVE_WIDTHS = (1200, 800, 400, 200)
+
+# Size the image is shrunk to before computing its BlurHash placeholder
+PLACEHOLDER_SIZE = 32
+
+# Replaced uploads stay this long (seconds): cached catalog snapshots and
+# open admin pages may still link them
+ORIGINAL_RETENTION = 24 * 3600
+
+
+def file_sha256(field_file) -> str:
+    """Hex SHA-256 of a stored file, read in chunks."""
+    digest = hashlib.sha256()
+    field_file.open('rb')
+    try:
+        for chunk in field_file.chunks():
+            digest.update(chunk)
+    finally:
+        field_file.close()
+    return digest.hexdigest()
+
+
+def _to_rgb(img):
+    """Flatten transparency onto white and convert to RGB."""
+    if img.mode in ('RGBA', 'P', 'LA'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if 'A' in img.mode else None)
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
 
 
-def compress_image(image_field) -> InMemoryUploadedFile | None:
+def open_image(image_field, max_dimension: int | None = None):
+    """
+    Open an image for processing without decoding more than needed.
+    - Refuses images over MAX_PIXELS before decoding them (decompression bombs)
+    - When the image will be downscaled to `max_dimension`, JPEGs are decoded
+      straight at a reduced 1/2, 1/4 or 1/8 scale so full-resolution pixels
+      are never materialized
+    - Applies the EXIF orientation
+    The stored dimensions, before any reduced decoding, are kept in
+    `img.info['source_size']`.
+    Raises ValueError if the image is too large.
+    """
+    img = Image.open(image_field)
+    w, h = img.size
+    if w * h > MAX_PIXELS:
+        raise ValueError(f'Image is too large: {w}x{h}')
+    img.info['source_size'] = (w, h)
+
+    if max_dimension and max(w, h) > max_dimension:
+        scale = max_dimension / max(w, h)
+        # Picks the smallest DCT scale still at least this large
+        img.draft('RGB', (max(1, int(w * scale)), max(1, int(h * scale))))
+
+    ImageOps.exif_transpose(img, in_place=True)
+    return img
+
+
+def compress_image(image_field, strip_metadata: bool = STRIP_METADATA) -> InMemoryUploadedFile | None:
     """
     Compress an ImageField value before saving.
     - Resizes so the longest side is at most MAX_DIMENSION px
     - Converts to JPEG at JPEG_QUALITY
+    - Drops EXIF data unless `strip_metadata` is False; the ICC color
+      profile is always kept
     - Returns a new InMemoryUploadedFile, or None if no image.
     """
     if not image_field:
         return None
 
     try:
-        img = Image.open(image_field)
-    except Exception:
-        return image_field  # can't process — return as-is
+        img = open_image(image_field, MAX_DIMENSION)
+        # A grayscale or CMYK profile would not match the converted pixels
+        icc_profile = img.info.get('icc_profile') if img.mode in ('RGB', 'RGBA') else None
+        exif = None if strip_metadata else img.getexif()
+        # Already small JPEGs that need no changes may be kept as they are.
+        # img.size is the drafted size here, so the stored one is checked
+        keep_original = (
+            img.format == 'JPEG' and img.mode in ('RGB', 'L')
+            and max(img.info['source_size']) <= MAX_DIMENSION
+            and not (strip_metadata and img.getexif())
+        )
 
-    # Convert RGBA/P to RGB for JPEG
-    if img.mode in ('RGBA', 'P', 'LA'):
-        background = Image.new('RGB', img.size, (255, 255, 255))
+        # Resize if too large; reduce() does the coarse steps for non-JPEGs.
+        # Palette images are converted first, they only resize with NEAREST
         if img.mode == 'P':
-            img = img.convert('RGBA')
-        background.paste(img, mask=img.split()[-1] if 'A' in img.mode else None)
-        img = background
-    elif img.mode != 'RGB':
-        img = img.convert('RGB')
+            img = _to_rgb(img)
+        img.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.LANCZOS, reducing_gap=3.0)
 
-    # Resize if too large
-    w, h = img.size
-    if max(w, h) > MAX_DIMENSION:
-        if w > h:
-            new_w = MAX_DIMENSION
-            new_h = int(h * MAX_DIMENSION / w)
-        else:
-            new_h = MAX_DIMENSION
-            new_w = int(w * MAX_DIMENSION / h)
-        img = img.resize((new_w, new_h), Image.LANCZOS)
+        # Convert RGBA/P to RGB for JPEG
+        img = _to_rgb(img)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f'Could not read image {getattr(image_field, "name", "")}: {e}')
+        return image_field  # can't process — return as-is
 
     # Save to buffer as JPEG
     buffer = io.BytesIO()
-    img.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+    options = {'quality': JPEG_QUALITY, 'optimize': True}
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    if exif:
+        options['exif'] = exif
+    img.save(buffer, format='JPEG', **options)
+
+    # Re-encoding an already compressed JPEG can make it bigger
+    if keep_original and buffer.tell() >= image_field.size:
+        image_field.seek(0)
+        buffer = io.BytesIO(image_field.read())
     buffer.seek(0)
 
     # Build new filename with .jpg extension
@@ -65,3 +168,132 @@ def compress_image(image_field) -> InMemoryUploadedFile | None:
         size=buffer.getbuffer().nbytes,
         charset=None,
     )
+
+
+def generate_derivatives(image_field) -> list:
+    """
+    Write downscaled WebP + JPEG copies of a stored image for each of
+    DERIVATIVE_WIDTHS not wider than the image itself.
+    Returns [{'width', 'webp', 'jpeg'}] with storage names, narrowest first,
+    or an empty list if the image can't be read.
+    """
+    if not image_field or not image_field.name:
+        return []
+
+    try:
+        image_field.open('rb')
+        img = _to_rgb(open_image(image_field))
+    except Exception:
+        return []
+
+    directory, basename = os.path.split(image_field.name)
+    stem = basename.rsplit('.', 1)[0] if '.' in basename else basename
+
+    widths = [w for w in DERIVATIVE_WIDTHS if w <= img.width] or [img.width]
+    sizes = []
+    # Widest first, each copy is resized from the previous one
+    for width in widths:
+        height = max(1, round(img.height * width / img.width))
+        if (width, height) != img.size:
+            img = img.resize((width, height), Image.LANCZOS)
+
+        names = {}
+        for fmt, ext, options in (
+            ('WEBP', 'webp', {'quality': WEBP_QUALITY, 'method': 4}),
+            ('JPEG', 'jpg', {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True}),
+        ):
+            buffer = io.BytesIO()
+            img.save(buffer, format=fmt, **options)
+            name = os.path.join(directory, 'sizes', f'{stem}_{width}.{ext}')
+            names[ext] = default_storage.save(name, ContentFile(buffer.getvalue()))
+
+        sizes.append({'width': width, 'webp': names['webp'], 'jpeg': names['jpg']})
+
+    image_field.close()
+    return sorted(sizes, key=lambda size: size['width'])
+
+
+def make_placeholder(image_field) -> str:
+    """
+    BlurHash of a stored image for clients to paint while it loads,
+    or '' if the image can't be read.
+    """
+    if not image_field or not image_field.name:
+        return ''
+
+    try:
+        image_field.open('rb')
+        img = _to_rgb(open_image(image_field, PLACEHOLDER_SIZE))
+        img.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.BILINEAR)
+    except Exception:
+        return ''
+    finally:
+        image_field.close()
+
+    # More horizontal components for landscape images and vice versa
+    x_components, y_components = (4, 3) if img.width >= img.height else (3, 4)
+    return blurhash.encode(img, x_components, y_components)
+
+
+def schedule_image_processing(instance):
+    """Queue a freshly uploaded image for processing once the row is committed."""
+    payload = {'model': instance._meta.label, 'pk': instance.pk}
+    transaction.on_commit(lambda: enqueue(IMAGE_QUEUE, payload))
+
+
+def schedule_deletion(name: str):
+    """Delete a replaced file after ORIGINAL_RETENTION, via the image worker."""
+    enqueue_later(IMAGE_QUEUE, {'delete': name}, ORIGINAL_RETENTION)
+
+
+def delete_file(name: str):
+    """Delete a file scheduled by schedule_deletion()."""
+    try:
+        default_storage.delete(name)
+    except OSError as e:
+        logger.warning(f'Could not delete {name}: {e}')
+
+
+def process_image(model_label: str, pk: int) -> str | None:
+    """
+    Compress a pending uploaded image into a shared blob and point the row
+    at it, filling in `image_sizes` and `image_placeholder` where the model
+    has them.
+    A picture that is already stored is reused without compressing it again.
+    Returns the resulting status, or None if there was nothing to do.
+    """
+    from apps.blobs.store import blob_placeholder, blob_sizes, release, store_image
+
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or instance.image_status != IMAGE_PENDING or not instance.image:
+        return None
+
+    original_name = instance.image.name
+    stored = store_image(instance.image)
+    if stored is None:
+        instance.image_status = IMAGE_FAILED
+        instance.save(update_fields=['image_status'])
+        return IMAGE_FAILED
+
+    blob, _ = stored
+    instance.image.name = blob.name
+    instance.image_hash = blob.hash
+    instance.image_status = IMAGE_READY
+    update_fields = ['image', 'image_hash', 'image_status']
+    if hasattr(instance, 'image_sizes'):
+        instance.image_sizes = blob_sizes(blob, instance.image)
+        update_fields.append('image_sizes')
+    if hasattr(instance, 'image_placeholder'):
+        instance.image_placeholder = blob_placeholder(blob, instance.image)
+        update_fields.append('image_placeholder')
+
+    # The image may have been replaced while we were working on it
+    current = model.objects.filter(pk=pk).values_list('image', flat=True).first()
+    if current != original_name:
+        release(blob.hash)
+        return None
+    instance.save(update_fields=update_fields)
+
+    schedule_deletion(original_name)
+    return IMAGE_READY
@@ -0,0 +1,70 @@
+"""
+Minimal reliable job queue on Redis lists.
+Producers LPUSH JSON payloads; a worker atomically moves each job to a
+per-queue processing list while it runs and removes it once done, so jobs
+held by a crashed worker can be put back with requeue_unfinished().
+Jobs scheduled for later wait in a sorted set until move_due() queues them.
+"""
+import json
+import time
+
+from django_redis import get_redis_connection
+
+
+def _processing_key(queue: str) -> str:
+    return f'queue:{queue}:processing'
+
+
+def _queue_key(queue: str) -> str:
+    return f'queue:{queue}'
+
+
+def _delayed_key(queue: str) -> str:
+    return f'queue:{queue}:delayed'
+
+
+def enqueue(queue: str, payload: dict):
+    get_redis_connection('default').lpush(_queue_key(queue), json.dumps(payload))
+
+
+def enqueue_later(queue: str, payload: dict, delay: int):
+    """Queue a job once `delay` seconds have passed. Identical payloads are scheduled once."""
+    get_redis_connection('default').zadd(_delayed_key(queue), {json.dumps(payload): time.time() + delay})
+
+
+def move_due(queue: str) -> int:
+    """Queue the scheduled jobs that are due. Safe to run from several workers."""
+    conn = get_redis_connection('default')
+    moved = 0
+    for raw in conn.zrangebyscore(_delayed_key(queue), '-inf', time.time()):
+        # Only the worker that removes the job queues it
+        if conn.zrem(_delayed_key(queue), raw):
+            conn.lpush(_queue_key(queue), raw)
+            moved += 1
+    return moved
+
+
+def consume(queue: str, timeout: int = 5):
+    """
+    Block up to `timeout` seconds for the next job.
+    Returns (raw, payload) or None; pass raw to ack() when finished.
+    """
+    raw = get_redis_connection('default').blmove(
+        _queue_key(queue), _processing_key(queue), timeout, src='RIGHT', dest='LEFT',
+    )
+    if raw is None:
+        return None
+    return raw, json.loads(raw)
+
+
+def ack(queue: str, raw):
+    get_redis_connection('default').lrem(_processing_key(queue), 1, raw)
+
+
+def requeue_unfinished(queue: str) -> int:
+    """Move jobs left in the processing list back to the queue. Run on worker start."""
+    conn = get_redis_connection('default')
+    moved = 0
+    while conn.lmove(_processing_key(queue), _queue_key(queue), src='RIGHT', dest='RIGHT'):
+        moved += 1
+    return moved
@@ -0,0 +1,63 @@
+"""
+Content-hashed media storage.
+Every stored file is named after the SHA-256 of its bytes, so a media URL
+always serves the same content and can be cached as immutable.
+"""
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+
+BLOB_PREFIX = 'blobs'
+
+
+def content_sha256(content) -> str:
+    """Hex SHA-256 of a File's bytes, leaving it rewound."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def blob_name(digest: str, ext: str) -> str:
+    return f'{BLOB_PREFIX}/{digest[:2]}/{digest}{ext}'
+
+
+def is_blob(name: str) -> bool:
+    return bool(name) and name.startswith(f'{BLOB_PREFIX}/')
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    """
+    Default storage: keeps the directory and extension of the given name
+    and replaces the file name with the content hash. Django's usual
+    suffixing keeps concurrent copies of the same bytes apart.
+    """
+
+    def save(self, name, content, max_length=None):
+        directory, basename = os.path.split(name)
+        ext = os.path.splitext(basename)[1].lower()
+        name = os.path.join(directory, f'{content_sha256(content)}{ext}')
+        return super().save(name, content, max_length=max_length)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Storage for shared blobs: files go to blobs/ab/ab12...ef.jpg and the
+    name passed to save() only contributes its extension. Saving bytes that
+    are already stored writes nothing and returns the existing name.
+    """
+
+    def save(self, name, content, max_length=None):
+        ext = os.path.splitext(name)[1].lower()
+        name = blob_name(content_sha256(content), ext)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+# Same location and URL as the default storage, so blob names can be
+# assigned to ordinary FileFields
+blob_storage = ContentAddressedStorage()
@@ -1,13 +1,20 @@
 import { http } from './http'
-import type { Order } from '../types'
+import type { AdminOrderFilters, NotificationJob, Order, OrderQuote, OrderSummary, Page } from '../types'
 
 export const ordersApi = {
-  list: () =>
-    http.get<Order[]>('/orders/').then((r) => r.data),
+  list: (cursor?: string) =>
+    http.get<Page<OrderSummary>>('/orders/', { params: { limit: 20, ...(cursor ? { cursor } : {}) } }).then((r) => r.data),
 
   detail: (id: number) =>
     http.get<Order>(`/orders/${id}/`).then((r) => r.data),
 
+  quote: (data: {
+    delivery_method: string
+    is_urgent?: boolean
+    items: { product_id: number; quantity: number; price_type: string; selected_grams?: number }[]
+  }) =>
+    http.post<OrderQuote>('/orders/quote/', data).then((r) => r.data),
+
   create: (data: {
     delivery_method: string
     delivery_district: string
@@ -17,17 +24,23 @@ export const ordersApi = {
     address?: string
     comment: string
     promo_code: string
-    items: { product_id: number; quantity: number; price_type: string }[]
-  }) =>
-    http.post<Order>('/orders/', data).then((r) => r.data),
+    items: { product_id: number; quantity: number; price_type: string; selected_grams?: number }[]
+  }, idempotencyKey: string) =>
+    http.post<Order>('/orders/', data, { headers: { 'Idempotency-Key': idempotencyKey } }).then((r) => r.data),
 
   // Admin
-  adminList: (params?: { status?: string }) =>
-    http.get<Order[]>('/orders/admin/', { params }).then((r) => r.data),
+  adminList: (params?: AdminOrderFilters & { limit?: number; cursor?: string }) =>
+    http.get<Page<Order>>('/orders/admin/', { params: { limit: 30, ...params } }).then((r) => r.data),
+
+  adminExport: (format: 'csv' | 'xlsx', params?: AdminOrderFilters) =>
+    http.get<Blob>(`/orders/admin/export.${format}`, { params, responseType: 'blob' }).then((r) => r.data),
 
   adminUpdateStatus: (id: number, status: string) =>
     http.patch<Order>(`/orders/admin/${id}/`, { status }).then((r) => r.data),
 
   adminBulkStatus: (ids: number[], status: string) =>
-    http.post<{ updated: number }>('/orders/admin/bulk/', { ids, status }).then((r) => r.data),
+    http.post<{ updated: number; job: number | null }>('/orders/admin/bulk/', { ids, status }).then((r) => r.data),
+
+  adminJob: (id: number) =>
+    http.get<NotificationJob>(`/orders/admin/jobs/${id}/`).then((r) => r.data),
 }
@@ -0,0 +1,71 @@
+import { useEffect, useRef } from 'react'
+import { http } from '../api/http'
+
+export interface OrderEvent {
+  event: string
+  data: any
+}
+
+// Reads the admin order event stream with fetch, since EventSource
+// can't send the Authorization header. Reconnects with Last-Event-ID
+// so events are not lost in between.
+export const useOrderEvents = (handler: (event: OrderEvent) => void) => {
+  const handlerRef = useRef(handler)
+  handlerRef.current = handler
+
+  useEffect(() => {
+    const controller = new AbortController()
+    let lastEventId = ''
+    let retry = 3000
+
+    const connect = async () => {
+      const headers: Record<string, string> = { Accept: 'text/event-stream' }
+      for (const [key, value] of Object.entries(http.defaults.headers.common)) {
+        if (typeof value === 'string') headers[key] = value
+      }
+      const auth = http.defaults.headers['Authorization']
+      if (typeof auth === 'string') headers.Authorization = auth
+      if (lastEventId) headers['Last-Event-ID'] = lastEventId
+
+      const response = await fetch(`${http.defaults.baseURL}/orders/admin/events/`, {
+        headers, signal: controller.signal,
+      })
+      if (!response.ok || !response.body) throw new Error(`HTTP ${response.status}`)
+
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+      let buffer = ''
+      for (;;) {
+        const { value, done } = await reader.read()
+        if (done) return
+        buffer += value
+        let end
+        while ((end = buffer.indexOf('\n\n')) >= 0) {
+          const block = buffer.slice(0, end)
+          buffer = buffer.slice(end + 2)
+          let event = 'message'
+          let data = ''
+          for (const line of block.split('\n')) {
+            if (line.startsWith('id: ')) lastEventId = line.slice(4)
+            else if (line.startsWith('event: ')) event = line.slice(7)
+            else if (line.startsWith('data: ')) data += line.slice(6)
+            else if (line.startsWith('retry: ')) retry = parseInt(line.slice(7)) || retry
+          }
+          if (data) handlerRef.current({ event, data: JSON.parse(data) })
+        }
+      }
+    }
+
+    const run = async () => {
+      while (!controller.signal.aborted) {
+        try { await connect() } catch (e) {
+          if (controller.signal.aborted) return
+          console.error(e)
+        }
+        await new Promise((resolve) => setTimeout(resolve, retry))
+      }
+    }
+    run()
+
+    return () => controller.abort()
+  }, [])
+}
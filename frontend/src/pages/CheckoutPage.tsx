@@ -5,7 +5,7 @@ import { useUserStore } from '../store/userStore'
 import { ordersApi } from '../api/orders'
 import { settingsApi } from '../api/settings'
 import { useAppBackButton } from '../hooks/useAppBackButton'
-import type { ShopSettings } from '../types'
+import type { OrderQuote, ShopSettings } from '../types'
 
 export default function CheckoutPage() {
   const navigate = useNavigate()
@@ -20,7 +20,10 @@ export default function CheckoutPage() {
   const [comment, setComment] = useState('')
   const [promoCode, setPromoCode] = useState('')
   const [submitting, setSubmitting] = useState(false)
+  // One key per checkout attempt: a retried submit can't create a second order
+  const [idempotencyKey] = useState(() => crypto.randomUUID())
   const [error, setError] = useState('')
+  const [quote, setQuote] = useState<OrderQuote | null>(null)
 
   // Address fields
   const [street, setStreet] = useState('')
@@ -52,12 +55,31 @@ export default function CheckoutPage() {
     }).catch(console.error)
   }, [])
 
+  const cartItems = items.map((i) => ({
+    product_id: i.product.id,
+    quantity: i.quantity,
+    price_type: i.priceType,
+    ...(i.priceType === 'gram' && i.selectedGrams ? { selected_grams: i.selectedGrams } : {}),
+  }))
+  const quoteMethodName = settings?.delivery_methods.find((m) => m.id === deliveryMethodId)?.name || ''
+  const cartKey = JSON.stringify(cartItems)
+
+  // Totals from the server, priced exactly as the order will be
+  useEffect(() => {
+    if (!settings || cartItems.length === 0) return
+    let cancelled = false
+    ordersApi.quote({ delivery_method: quoteMethodName, is_urgent: isUrgent, items: cartItems })
+      .then((q) => { if (!cancelled) setQuote(q) })
+      .catch(() => { if (!cancelled) setQuote(null) })
+    return () => { cancelled = true }
+  }, [settings, cartKey, quoteMethodName, isUrgent])
+
   if (items.length === 0) {
     navigate('/cart')
     return null
   }
 
-  const itemsTotal = totalPrice()
+  const itemsTotal = quote ? parseFloat(quote.items_total) : totalPrice()
   const minSum = settings ? parseFloat(settings.min_order_sum) : 0
   const freeThreshold = settings ? parseFloat(settings.free_delivery_threshold) : 5000
   const urgencySurcharge = settings ? parseFloat(settings.urgency_surcharge) : 0
@@ -66,11 +88,12 @@ export default function CheckoutPage() {
   const deliveryMethodName = selectedMethod?.name || ''
   const deliveryPrice = selectedMethod ? parseFloat(selectedMethod.price) : 0
   const isFreeDelivery = freeThreshold > 0 && itemsTotal >= freeThreshold
-  const actualDeliveryPrice = isFreeDelivery ? 0 : deliveryPrice
-  const actualUrgency = isUrgent ? urgencySurcharge : 0
-  const grandTotal = itemsTotal + actualDeliveryPrice + actualUrgency
+  // The local estimate is shown until the quote arrives
+  const actualDeliveryPrice = quote ? parseFloat(quote.delivery_price) : isFreeDelivery ? 0 : deliveryPrice
+  const actualUrgency = quote ? parseFloat(quote.urgency_surcharge) : isUrgent ? urgencySurcharge : 0
+  const grandTotal = quote ? parseFloat(quote.total) : itemsTotal + actualDeliveryPrice + actualUrgency
 
-  const belowMinSum = minSum > 0 && itemsTotal < minSum
+  const belowMinSum = quote ? quote.below_min_sum : minSum > 0 && itemsTotal < minSum
 
   // Build full address string
   const buildAddress = () => {
@@ -98,13 +121,8 @@ export default function CheckoutPage() {
         address: buildAddress(),
         comment,
         promo_code: promoCode,
-        items: items.map((i) => ({
-          product_id: i.product.id,
-          quantity: i.quantity,
-          price_type: i.priceType,
-          ...(i.priceType === 'gram' && i.selectedGrams ? { selected_grams: i.selectedGrams } : {}),
-        })),
-      })
+        items: cartItems,
+      }, idempotencyKey)
       clearCart()
       navigate('/orders')
     } catch (e: any) {
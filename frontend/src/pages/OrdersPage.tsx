@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react'
 import Header from '../components/Header'
 import { ordersApi } from '../api/orders'
 import { STATUS_LABELS } from '../types'
-import type { Order } from '../types'
+import type { Order, OrderSummary } from '../types'
 
 const statusColors: Record<string, string> = {
   new: '#2196F3',
@@ -14,15 +14,40 @@ const statusColors: Record<string, string> = {
 }
 
 export default function OrdersPage() {
-  const [orders, setOrders] = useState<Order[]>([])
+  const [orders, setOrders] = useState<OrderSummary[]>([])
+  const [details, setDetails] = useState<Record<number, Order>>({})
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [expandedId, setExpandedId] = useState<number | null>(null)
 
   useEffect(() => {
-    ordersApi.list().then(setOrders).catch(console.error).finally(() => setLoading(false))
+    ordersApi.list()
+      .then((page) => { setOrders(page.results); setNextCursor(page.next) })
+      .catch(console.error)
+      .finally(() => setLoading(false))
   }, [])
 
-  const toggle = (id: number) => setExpandedId(expandedId === id ? null : id)
+  const loadMore = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const page = await ordersApi.list(nextCursor)
+      setOrders((prev) => [...prev, ...page.results])
+      setNextCursor(page.next)
+    } catch (e) { console.error(e) }
+    finally { setLoadingMore(false) }
+  }
+
+  // Items and delivery details are loaded when an order is opened
+  const toggle = (id: number) => {
+    setExpandedId(expandedId === id ? null : id)
+    if (!details[id]) {
+      ordersApi.detail(id)
+        .then((order) => setDetails((prev) => ({ ...prev, [id]: order })))
+        .catch(console.error)
+    }
+  }
 
   return (
     <div>
@@ -41,8 +66,9 @@ export default function OrdersPage() {
           <div style={{ display: 'flex', flexDirection: 'column', gap: 12 }}>
             {orders.map((order) => {
               const expanded = expandedId === order.id
-              const deliveryPrice = parseFloat(order.delivery_price || '0')
-              const urgency = parseFloat(order.urgency_surcharge || '0')
+              const detail = details[order.id]
+              const deliveryPrice = parseFloat(detail?.delivery_price || '0')
+              const urgency = parseFloat(detail?.urgency_surcharge || '0')
               const total = parseFloat(order.total)
               const itemsTotal = total - deliveryPrice - urgency
 
@@ -78,11 +104,11 @@ export default function OrdersPage() {
                     </span>
                   </div>
 
-                  {!expanded ? (
+                  {!expanded || !detail ? (
                     <>
                       {/* Collapsed: short summary */}
                       <div style={{ fontSize: 13, color: 'var(--text-secondary)', marginBottom: 10 }}>
-                        {order.items.length} {order.items.length === 1 ? 'товар' : order.items.length < 5 ? 'товара' : 'товаров'}
+                        {order.item_count} {order.item_count === 1 ? 'товар' : order.item_count < 5 ? 'товара' : 'товаров'}
                       </div>
                       <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
                         <span style={{ fontSize: 12, color: 'var(--text-hint)' }}>
@@ -101,7 +127,7 @@ export default function OrdersPage() {
                       {/* Items */}
                       <div style={{ marginBottom: 12 }}>
                         <div style={{ fontSize: 13, fontWeight: 600, marginBottom: 6, color: 'var(--text-secondary)' }}>Товары</div>
-                        {order.items.map((item) => (
+                        {detail.items.map((item) => (
                           <div key={item.id} style={{
                             display: 'flex', justifyContent: 'space-between',
                             fontSize: 13, padding: '4px 0',
@@ -114,34 +140,34 @@ export default function OrdersPage() {
                       </div>
 
                       {/* Delivery info */}
-                      {order.delivery_method && (
+                      {detail.delivery_method && (
                         <div style={{ marginBottom: 12, fontSize: 13 }}>
                           <div style={{ fontWeight: 600, marginBottom: 4, color: 'var(--text-secondary)' }}>Доставка</div>
-                          <div>🚚 {order.delivery_method}</div>
-                          {order.delivery_district && <div style={{ color: 'var(--text-secondary)' }}>Район: {order.delivery_district}</div>}
-                          {order.delivery_interval && <div style={{ color: 'var(--text-secondary)' }}>Интервал: {order.delivery_interval}</div>}
-                          {order.is_urgent && <div style={{ color: '#FF9800' }}>⚡ Срочная доставка</div>}
+                          <div>🚚 {detail.delivery_method}</div>
+                          {detail.delivery_district && <div style={{ color: 'var(--text-secondary)' }}>Район: {detail.delivery_district}</div>}
+                          {detail.delivery_interval && <div style={{ color: 'var(--text-secondary)' }}>Интервал: {detail.delivery_interval}</div>}
+                          {detail.is_urgent && <div style={{ color: '#FF9800' }}>⚡ Срочная доставка</div>}
                         </div>
                       )}
 
                       {/* Address */}
-                      {order.address && (
+                      {detail.address && (
                         <div style={{ marginBottom: 12, fontSize: 13 }}>
-                          <span style={{ color: 'var(--text-secondary)' }}>📍 </span>{order.address}
+                          <span style={{ color: 'var(--text-secondary)' }}>📍 </span>{detail.address}
                         </div>
                       )}
 
                       {/* Payment */}
-                      {order.payment_method && (
+                      {detail.payment_method && (
                         <div style={{ marginBottom: 12, fontSize: 13 }}>
-                          <span style={{ color: 'var(--text-secondary)' }}>💳 </span>{order.payment_method}
+                          <span style={{ color: 'var(--text-secondary)' }}>💳 </span>{detail.payment_method}
                         </div>
                       )}
 
                       {/* Comment */}
-                      {order.comment && (
+                      {detail.comment && (
                         <div style={{ marginBottom: 12, fontSize: 13, fontStyle: 'italic', color: 'var(--text-secondary)' }}>
-                          💬 {order.comment}
+                          💬 {detail.comment}
                         </div>
                       )}
 
@@ -160,7 +186,7 @@ export default function OrdersPage() {
                             <span>{deliveryPrice.toFixed(0)} ₽</span>
                           </div>
                         )}
-                        {deliveryPrice === 0 && order.delivery_method && (
+                        {deliveryPrice === 0 && detail.delivery_method && (
                           <div style={{ display: 'flex', justifyContent: 'space-between' }}>
                             <span style={{ color: 'var(--text-secondary)' }}>Доставка:</span>
                             <span style={{ color: 'var(--green-main)' }}>Бесплатно</span>
@@ -184,13 +210,27 @@ export default function OrdersPage() {
 
                       {/* Date */}
                       <div style={{ marginTop: 10, fontSize: 12, color: 'var(--text-hint)' }}>
-                        {new Date(order.created_at).toLocaleString('ru-RU')}
+                        {new Date(detail.created_at).toLocaleString('ru-RU')}
                       </div>
                     </>
                   )}
                 </div>
               )
             })}
+            {nextCursor && (
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                style={{
+                  padding: '10px 14px', borderRadius: 10,
+                  fontSize: 13, fontWeight: 600,
+                  background: 'var(--white)', color: 'var(--green-main)',
+                  border: '1px solid var(--green-main)',
+                }}
+              >
+                {loadingMore ? 'Загрузка...' : 'Показать ещё'}
+              </button>
+            )}
           </div>
         )}
       </div>
@@ -14,7 +14,7 @@ export default function AdminDashboard() {
 
   useEffect(() => {
     analyticsApi.get({ period: 'today' }).then(setTodayStats).catch(console.error)
-    ordersApi.adminList({ status: 'new' }).then((orders) => setRecentOrders(orders.slice(0, 5))).catch(console.error)
+    ordersApi.adminList({ status: 'new', limit: 5 }).then((page) => setRecentOrders(page.results)).catch(console.error)
   }, [])
 
   const cards = [
@@ -1,9 +1,10 @@
 import { useState, useEffect, useCallback } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { useAppBackButton } from '../../hooks/useAppBackButton'
+import { useOrderEvents } from '../../hooks/useOrderEvents'
 import { ordersApi } from '../../api/orders'
 import { STATUS_LABELS } from '../../types'
-import type { Order } from '../../types'
+import type { NotificationJob, Order } from '../../types'
 
 const STATUS_OPTIONS = ['new', 'confirmed', 'preparing', 'delivering', 'completed', 'cancelled']
 const statusColors: Record<string, string> = {
@@ -16,25 +17,84 @@ export default function AdminOrders() {
   const [orders, setOrders] = useState<Order[]>([])
   const [loading, setLoading] = useState(true)
   const [filter, setFilter] = useState('')
+  const [search, setSearch] = useState('')
+  const [urgentOnly, setUrgentOnly] = useState(false)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [job, setJob] = useState<NotificationJob | null>(null)
   const [expandedId, setExpandedId] = useState<number | null>(null)
   const [selectedIds, setSelectedIds] = useState<Set<number>>(new Set())
 
   useAppBackButton(useCallback(() => navigate('/profile'), [navigate]))
 
-  useEffect(() => { loadOrders() }, [filter])
+  // Debounce typing in the search box
+  useEffect(() => {
+    const timer = setTimeout(loadOrders, search ? 300 : 0)
+    return () => clearTimeout(timer)
+  }, [filter, search, urgentOnly])
 
   // Clear selection when filter changes
-  useEffect(() => { setSelectedIds(new Set()) }, [filter])
+  useEffect(() => { setSelectedIds(new Set()) }, [filter, search, urgentOnly])
+
+  const filters = () => ({
+    ...(filter ? { status: filter } : {}),
+    ...(search.trim() ? { search: search.trim() } : {}),
+    ...(urgentOnly ? { is_urgent: '1' as const } : {}),
+  })
 
   const loadOrders = async () => {
     setLoading(true)
     try {
-      const data = await ordersApi.adminList(filter ? { status: filter } : undefined)
-      setOrders(data)
+      const page = await ordersApi.adminList(filters())
+      setOrders(page.results)
+      setNextCursor(page.next)
     } catch (e) { console.error(e) }
     finally { setLoading(false) }
   }
 
+  const loadMore = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const page = await ordersApi.adminList({ ...filters(), cursor: nextCursor })
+      setOrders((prev) => [...prev, ...page.results])
+      setNextCursor(page.next)
+    } catch (e) { console.error(e) }
+    finally { setLoadingMore(false) }
+  }
+
+  // Live updates instead of reloading the list
+  useOrderEvents(({ event, data }) => {
+    if (event === 'reset') {
+      loadOrders()
+    } else if (event === 'order.created') {
+      const order = data as Order
+      // Filtered lists are reloaded, the server knows which orders match
+      if (filter || search.trim() || urgentOnly) {
+        if (!filter || order.status === filter) loadOrders()
+      } else {
+        setOrders((prev) => prev.some((o) => o.id === order.id) ? prev : [order, ...prev])
+      }
+    } else if (event === 'order.status') {
+      const ids = new Set<number>((data.ids as (number | string)[]).map(Number))
+      setOrders((prev) => prev
+        .map((o) => ids.has(o.id) ? { ...o, status: data.status } : o)
+        .filter((o) => !filter || o.status === filter))
+    }
+  })
+
+  const handleExport = async (format: 'csv' | 'xlsx') => {
+    try {
+      const blob = await ordersApi.adminExport(format, filters())
+      const url = URL.createObjectURL(blob)
+      const link = document.createElement('a')
+      link.href = url
+      link.download = `orders.${format}`
+      link.click()
+      URL.revokeObjectURL(url)
+    } catch (e) { console.error(e) }
+  }
+
   const handleStatusChange = async (orderId: number, newStatus: string) => {
     try {
       await ordersApi.adminUpdateStatus(orderId, newStatus)
@@ -65,12 +125,26 @@ export default function AdminOrders() {
   const handleBulkStatus = async (newStatus: string) => {
     if (selectedIds.size === 0) return
     try {
-      await ordersApi.adminBulkStatus(Array.from(selectedIds), newStatus)
+      const result = await ordersApi.adminBulkStatus(Array.from(selectedIds), newStatus)
       setSelectedIds(new Set())
       loadOrders()
+      if (result.job) followJob(result.job)
     } catch (e) { console.error(e) }
   }
 
+  // Clients are notified in the background, show how far it got
+  const followJob = async (id: number) => {
+    for (;;) {
+      try {
+        const progress = await ordersApi.adminJob(id)
+        setJob(progress)
+        if (progress.done) break
+      } catch (e) { console.error(e); break }
+      await new Promise((resolve) => setTimeout(resolve, 2000))
+    }
+    setTimeout(() => setJob((current) => current?.id === id ? null : current), 5000)
+  }
+
   return (
     <div style={{ padding: 16 }}>
       <h2 style={{ fontSize: 20, fontWeight: 700, marginBottom: 12 }}>Заказы</h2>
@@ -106,6 +180,50 @@ export default function AdminOrders() {
         ))}
       </div>
 
+      {/* Search + urgency */}
+      <div style={{ display: 'flex', gap: 8, alignItems: 'center', marginBottom: 12 }}>
+        <input
+          type="search"
+          value={search}
+          onChange={(e) => setSearch(e.target.value)}
+          placeholder="Адрес или комментарий"
+          style={{
+            flex: 1, padding: '8px 12px', borderRadius: 8,
+            border: '1px solid #e0e0e0', fontSize: 13,
+          }}
+        />
+        <label style={{ display: 'flex', alignItems: 'center', gap: 6, fontSize: 13, cursor: 'pointer', whiteSpace: 'nowrap' }}>
+          <input
+            type="checkbox"
+            checked={urgentOnly}
+            onChange={(e) => setUrgentOnly(e.target.checked)}
+            style={{ width: 18, height: 18, accentColor: 'var(--green-main)' }}
+          />
+          Срочные
+        </label>
+        {(['xlsx', 'csv'] as const).map((format) => (
+          <button
+            key={format}
+            onClick={() => handleExport(format)}
+            style={{
+              padding: '6px 10px', borderRadius: 8, fontSize: 12, fontWeight: 600,
+              background: 'var(--white)', color: 'var(--green-main)',
+              border: '1px solid var(--green-main)', whiteSpace: 'nowrap',
+            }}
+          >
+            {format === 'xlsx' ? 'Excel' : 'CSV'}
+          </button>
+        ))}
+      </div>
+
+      {job && (
+        <div style={{ fontSize: 12, color: 'var(--text-secondary)', marginBottom: 12 }}>
+          Уведомления клиентам: {job.sent} из {job.total}
+          {job.failed > 0 ? `, не доставлено: ${job.failed}` : ''}
+          {job.done ? ' — готово' : '…'}
+        </div>
+      )}
+
       {/* Select all + bulk actions */}
       {orders.length > 0 && (
         <div style={{
@@ -331,6 +449,20 @@ export default function AdminOrders() {
               </div>
             )
           })}
+          {nextCursor && (
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              style={{
+                padding: '10px 14px', borderRadius: 10,
+                fontSize: 13, fontWeight: 600,
+                background: 'var(--white)', color: 'var(--green-main)',
+                border: '1px solid var(--green-main)',
+              }}
+            >
+              {loadingMore ? 'Загрузка...' : 'Показать ещё'}
+            </button>
+          )}
         </div>
       )}
     </div>
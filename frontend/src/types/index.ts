@@ -17,10 +17,18 @@ export interface User {
   created_at: string
 }
 
+export interface ImageSize {
+  width: number
+  webp: string
+  jpeg: string
+}
+
 export interface Category {
   id: number
   name: string
   image: string | null
+  image_sizes?: ImageSize[]
+  image_placeholder?: string  // BlurHash
   sort_order: number
   is_active: boolean
 }
@@ -28,6 +36,8 @@ export interface Category {
 export interface ProductImage {
   id: number
   image: string
+  sizes?: ImageSize[]
+  placeholder?: string  // BlurHash
   sort_order: number
 }
 
@@ -53,6 +63,8 @@ export interface Product {
   tag: '' | 'hit' | 'sale' | 'recommended'
   in_stock: boolean
   main_image?: string | null
+  main_image_sizes?: ImageSize[]
+  main_image_placeholder?: string  // BlurHash
   images?: ProductImage[]
   created_at?: string
 }
@@ -92,11 +104,57 @@ export interface Order {
   comment: string
   promo_code: string
   total: string
+  item_count: number
   items: OrderItem[]
   created_at: string
   updated_at: string
 }
 
+export interface OrderSummary {
+  id: number
+  status: string
+  total: string
+  item_count: number
+  created_at: string
+}
+
+export interface Page<T> {
+  results: T[]
+  next: string | null
+}
+
+export interface AdminOrderFilters {
+  status?: string
+  delivery_method?: string
+  district?: string
+  interval?: string
+  is_urgent?: '1' | '0'
+  date_from?: string
+  date_to?: string
+  search?: string
+}
+
+export interface NotificationJob {
+  id: number
+  description: string
+  total: number
+  sent: number
+  failed: number
+  pending: number
+  done: boolean
+  created_at: string
+}
+
+export interface OrderQuote {
+  items: Omit<OrderItem, 'id'>[]
+  items_total: string
+  delivery_price: string
+  urgency_surcharge: string
+  total: string
+  min_order_sum: string
+  below_min_sum: boolean
+}
+
 export interface ChatMessage {
   id: number
   room: number